@@ -10,12 +10,16 @@ import os
 import json
 import threading
 import time
-from queue import Queue
+from queue import Queue, Empty
 
 # Modülleri import et
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from config import SECRET_KEY, ADMIN_USER, ADMIN_PASS, VEHICLE_CATEGORIES
+from config import SECRET_KEY, ADMIN_USER, ADMIN_PASS, VEHICLE_CATEGORIES, SCRAPE_REPORT_PATH
+from config import LIVE_FEED_HEARTBEAT_SECONDS
 from models.database import db
+from models.pagination import InvalidCursor
+from models.filter_keys import key_filters
+from models.live_feed import LiveFeed
 
 
 app = Flask(__name__, template_folder='templates', static_folder='static')
@@ -121,7 +125,7 @@ def logout():
 def dashboard():
     """Ana dashboard sayfası"""
     try:
-        stats = db.get_stats()
+        stats = db.get_summary_stats()
     except Exception as e:
         stats = {"total": 0, "firsatlar": 0, "avg_price": 0, "brand_distribution": []}
         print(f"Stats hatası: {e}")
@@ -157,36 +161,15 @@ def api_vehicles():
         
         only_firsatlar = request.args.get('firsatlar') == 'true'
         
-        # Pagination
+        # Pagination: cursor (keyset) ile; page sadece istemcinin gösterdiği sayfa numarası
         page = int(request.args.get('page', 1))
-        limit = int(request.args.get('limit', 20))
-        skip = (page - 1) * limit
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+        cursor = request.args.get('cursor') or None
+        with_count = request.args.get('count', 'true') != 'false'
         
-        filters = {}
+        # Normalize anahtarlarda tam eşleşme (bileşik indekslerle; girdi regex'e girmez)
+        filters = key_filters(brand, model, fuel, transmission)
         
-        if brand and model:
-            # Search by marka+model OR category containing both
-            category_pattern = f".*{brand}.*{model}.*"
-            filters['$or'] = [
-                {'marka': {'$regex': f'^{brand}$', '$options': 'i'}, 'model': {'$regex': f'.*{model}.*', '$options': 'i'}},
-                {'category': {'$regex': category_pattern, '$options': 'i'}}
-            ]
-        elif brand:
-            # Search by marka OR category containing brand
-            filters['$or'] = [
-                {'marka': {'$regex': f'^{brand}$', '$options': 'i'}},
-                {'category': {'$regex': f".*{brand}.*", '$options': 'i'}}
-            ]
-        elif model:
-            filters['$or'] = [
-                {'model': {'$regex': f'.*{model}.*', '$options': 'i'}},
-                {'category': {'$regex': f".*{model}.*", '$options': 'i'}}
-            ]
-            
-        if fuel:
-            filters['yakit'] = fuel
-        if transmission:
-            filters['vites'] = transmission
         if only_firsatlar:
             filters['ai_firsat'] = True
         
@@ -197,9 +180,8 @@ def api_vehicles():
         if min_year:
             filters['yil'] = {'$gte': int(min_year)}
         
-        # Toplam sayıyı al
-        total_count = db.vehicles.count_documents(filters)
-        print(f"DEBUG: Total count for filters {filters}: {total_count}")
+        # Toplam sayı (aynı filtre için kısa süreli önbellekten; count=false ile atlanır)
+        total_count = db.count_vehicles(filters) if with_count else None
         
         # Verileri çek (Optimize edilmiş Projection ile)
         projection = {
@@ -212,8 +194,7 @@ def api_vehicles():
             "created_at": 1, "updated_at": 1, "scraped_at": 1, "ai_updated_at": 1,
             "details": 1
         }
-        vehicles = db.get_all_vehicles(filters, limit=limit, skip=skip, projection=projection)
-        print(f"DEBUG: Fetched {len(vehicles)} vehicles. Skip: {skip}, Limit: {limit}")
+        vehicles, next_cursor = db.get_vehicles_page(filters, limit=limit, cursor=cursor, projection=projection)
         
         for v in vehicles:
             v['_id'] = str(v['_id'])
@@ -227,8 +208,16 @@ def api_vehicles():
             'data': vehicles,
             'page': page,
             'limit': limit,
-            'total_pages': (total_count + limit - 1) // limit if limit > 0 else 1
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None,
+            'total_pages': (total_count + limit - 1) // limit if total_count is not None else None
         })
+    except InvalidCursor as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'data': []
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -249,27 +238,15 @@ def api_stats():
         max_price = request.args.get('max_price')
         min_year = request.args.get('min_year') or request.args.get('yil')
         
-        filters = {}
+        # Sadece marka/model filtresi: materialize istatistik dokümanından tek okuma
+        if not (min_price or max_price or min_year) and (brand or not model):
+            return jsonify({
+                'success': True,
+                'data': db.get_summary_stats(brand, model)
+            })
+        
+        filters = key_filters(brand, model)
         
-        if brand and model:
-            # Search by marka+model OR category containing both
-            category_pattern = f".*{brand}.*{model}.*"
-            filters['$or'] = [
-                {'marka': brand, 'model': model},
-                {'category': {'$regex': category_pattern, '$options': 'i'}}
-            ]
-        elif brand:
-            # Search by marka OR category containing brand
-            filters['$or'] = [
-                {'marka': brand},
-                {'category': {'$regex': f".*{brand}.*", '$options': 'i'}}
-            ]
-        elif model:
-            filters['$or'] = [
-                {'model': model},
-                {'category': {'$regex': f".*{model}.*", '$options': 'i'}}
-            ]
-            
         if min_price:
             filters.setdefault('fiyat', {})['$gte'] = int(min_price)
         if max_price:
@@ -424,6 +401,67 @@ def api_logs():
         return jsonify({'success': False, 'error': str(e)})
 
 
+@app.route('/api/scrape-report')
+@login_required
+@admin_required
+def api_scrape_report():
+    """Son scraper çalışmasının faz bazında süre raporu"""
+    try:
+        report_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), SCRAPE_REPORT_PATH)
+        if not os.path.exists(report_path):
+            return jsonify({'success': True, 'report': None, 'message': 'Henüz scraper raporu yok.'})
+
+        with open(report_path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+
+        return jsonify({'success': True, 'report': report})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
+@app.route('/api/health')
+def api_health():
+    """
+    Yük dengeleyici/izleme için sağlık kontrolü (MongoDB ping)
+
+    Anonim istek sadece ok/degraded görür; hata metni, pid ve havuz ayarları admin oturumuna döner.
+    """
+    health = db.ping()
+    status_code = 200 if health['ok'] else 503
+    if session.get('role') != 'admin':
+        return jsonify({'success': health['ok'], 'status': 'ok' if health['ok'] else 'degraded'}), status_code
+    return jsonify({'success': health['ok'], 'status': 'ok' if health['ok'] else 'degraded',
+                    'mongo': health}), status_code
+
+
+# Worker başına tek izleyici (ilk abonelikte başlar)
+live_feed = LiveFeed(lambda: db.vehicles, db.get_summary_stats)
+
+
+@app.route('/api/stream')
+@login_required
+def api_stream():
+    """Canlı fırsat ilanları ve istatistik farkları (Server-Sent Events)"""
+    subscriber = live_feed.subscribe()
+
+    def generate():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event, data = subscriber.get(timeout=LIVE_FEED_HEARTBEAT_SECONDS)
+                except Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event}\ndata: {json.dumps(data, default=str, ensure_ascii=False)}\n\n"
+        finally:
+            # İstemci bağlantıyı kapatınca (GeneratorExit)
+            live_feed.unsubscribe(subscriber)
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 
 
 # ========================================
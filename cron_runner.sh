@@ -70,8 +70,12 @@ from models.database import db
 # Mükerrer kayıtları sil
 db.remove_duplicates()
 
-# 30 günden eski ilanları sil
-db.remove_old_listings(days=30)
+# Filtre anahtarı eksik kayıtları tamamla (yeni kayıtlar yazımda alır)
+from models.filter_keys import backfill_filter_keys
+backfill_filter_keys(db.vehicles)
+
+# 30 günden eski ilanları arşive taşı (gruplar halinde, hot koleksiyondan silinir)
+db.archive_old_listings(days=30)
 
 print('Temizlik tamamlandı!')
 "
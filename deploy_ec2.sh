@@ -169,8 +169,11 @@ ssh -i "$SSH_KEY" "$EC2_HOST" << 'REMOTE_SCRIPT'
     pkill -f "gunicorn.*app_v2" 2>/dev/null || true
     pkill -f "python.*app_v2" 2>/dev/null || true
     
+    # Normalize filtre anahtarları: API bunlarla sorgular, eski kayıtlar servis başlamadan tamamlanır
+    python3 models/filter_keys.py backfill || echo "⚠️ Filtre anahtarı backfill başarısız, cron temizliğinde tekrar denenecek"
+    
     # Gunicorn ile başlat
-    nohup gunicorn -w 4 -b 0.0.0.0:5000 app_v2:app \
+    nohup gunicorn -w 4 -k gthread --threads 16 -b 0.0.0.0:5000 app_v2:app \
         --access-logfile /var/log/ekergallery/access.log \
         --error-logfile /var/log/ekergallery/error.log \
         --daemon
@@ -198,5 +201,5 @@ echo "   2. Cron job'ları kurun:"
 echo "      ssh -i $SSH_KEY $EC2_HOST 'cd ~/EkerGallery && ./setup_cron.sh'"
 echo ""
 echo "   3. Servisi yeniden başlatın:"
-echo "      ssh -i $SSH_KEY $EC2_HOST 'cd ~/EkerGallery && source myenv/bin/activate && pkill -f gunicorn && gunicorn -w 4 -b 0.0.0.0:5000 app_v2:app --daemon'"
+echo "      ssh -i $SSH_KEY $EC2_HOST 'cd ~/EkerGallery && source myenv/bin/activate && pkill -f gunicorn && gunicorn -w 4 -k gthread --threads 16 -b 0.0.0.0:5000 app_v2:app --daemon'"
 echo ""
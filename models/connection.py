@@ -0,0 +1,126 @@
+# ========================================
+# EkerGallery - MongoDB Bağlantı Fabrikası
+# ========================================
+#
+# Web (gunicorn worker'ları), scraper ve AI işleri MongoClient'ı sadece buradan alır:
+# - Tek ayar seti: havuz boyutu, zaman aşımları, sıkıştırma, TLS/CA
+# - Süreç başına tembel (lazy) oluşturma: import sırasında bağlanılmaz; gunicorn
+#   fork'undan sonra her worker kendi client'ını ve havuzunu açar
+# - ping() ile sağlık kontrolü (gecikme + havuz ayarları)
+
+import importlib.util
+import os
+import sys
+import threading
+import time
+
+from pymongo import MongoClient
+from pymongo.server_api import ServerApi
+import certifi
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import MONGO_URI, DB_NAME
+from config import MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_MAX_IDLE_TIME_MS
+from config import MONGO_TIMEOUT_MS, MONGO_COMPRESSORS
+
+
+# uri -> (pid, MongoClient); pid farklıysa client ebeveyn süreçten fork ile gelmiştir
+_clients = {}
+_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    # Fork anında başka thread'in tuttuğu kilit çocukta sonsuza kadar kilitli kalabilir
+    global _lock
+    _lock = threading.Lock()
+    _clients.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+# Sıkıştırma kütüphanesi kurulu değilse pymongo uyarı verip algoritmayı atlar
+_COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+
+def available_compressors(names=MONGO_COMPRESSORS):
+    """Ayarlanan ve bu ortamda kurulu olan sıkıştırma algoritmaları (tercih sırasıyla)"""
+    result = []
+    for name in (n.strip() for n in names.split(",")):
+        module = _COMPRESSOR_MODULES.get(name)
+        if module and importlib.util.find_spec(module) is not None:
+            result.append(name)
+    return result
+
+
+def client_options(uri):
+    """Tüm giriş noktaları için ortak MongoClient ayarları"""
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "serverSelectionTimeoutMS": MONGO_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_TIMEOUT_MS,
+        "retryWrites": True,
+    }
+    compressors = available_compressors()
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+    # Atlas (mongodb+srv / tls=true): Stable API ve certifi CA paketi
+    if uri.startswith("mongodb+srv://") or "tls=true" in uri.lower() or "ssl=true" in uri.lower():
+        options["server_api"] = ServerApi('1')
+        options["tlsCAFile"] = certifi.where()
+    return options
+
+
+def get_client(uri=None):
+    """Bu süreç için paylaşılan MongoClient (ilk çağrıda oluşturulur, bağlantı havuzu thread-safe)"""
+    uri = uri or MONGO_URI
+    pid = os.getpid()
+    entry = _clients.get(uri)
+    if entry is not None and entry[0] == pid:
+        return entry[1]
+    with _lock:
+        entry = _clients.get(uri)
+        if entry is None or entry[0] != pid:
+            # Ebeveynden kalan client fork sonrası kullanılamaz (kapatılmaz, sadece bırakılır)
+            entry = (pid, MongoClient(uri, **client_options(uri)))
+            _clients[uri] = entry
+        return entry[1]
+
+
+def get_database(name=None, uri=None):
+    return get_client(uri)[name or DB_NAME]
+
+
+def ping(uri=None):
+    """
+    Sağlık kontrolü
+
+    Returns:
+        dict: ok, latency_ms, pid ve havuz ayarları (hata durumunda error)
+    """
+    started = time.perf_counter()
+    try:
+        client = get_client(uri)
+        client.admin.command('ping')
+    except Exception as e:
+        return {"ok": False, "error": str(e), "pid": os.getpid()}
+    return {
+        "ok": True,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+        "pid": os.getpid(),
+        "max_pool_size": client.options.pool_options.max_pool_size,
+        "min_pool_size": client.options.pool_options.min_pool_size,
+        "compressors": available_compressors(),
+    }
+
+
+def close_client(uri=None):
+    """Bu sürecin client'ını kapat (sonraki get_client yenisini açar)"""
+    uri = uri or MONGO_URI
+    with _lock:
+        entry = _clients.pop(uri, None)
+    if entry is not None and entry[0] == os.getpid():
+        entry[1].close()
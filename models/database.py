@@ -2,52 +2,55 @@
 # EkerGallery - Veritabanı İşlemleri
 # ========================================
 
-from pymongo import MongoClient, DESCENDING
-from pymongo.errors import ConnectionFailure
-from pymongo.server_api import ServerApi
-import certifi
-from datetime import datetime
+from pymongo import DESCENDING, ReplaceOne
+from datetime import datetime, timedelta
 import sys
 import os
+import time
+import json
+import threading
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import MONGO_URI, DB_NAME, COLLECTION_NAME
+from config import DB_NAME, COLLECTION_NAME, PRICE_HISTORY_COLLECTION
+from config import RETENTION_DAYS, ARCHIVE_COLLECTION, ARCHIVE_BATCH_SIZE, ARCHIVE_BATCH_PAUSE_SECONDS, ARCHIVE_TTL_DAYS
+from config import STATS_COLLECTION, STATS_MAX_AGE_HOURS
+from models.connection import get_client, close_client, ping
+from models.stats import refresh_stats, read_stats, UNKNOWN_KEY
+from models.pagination import SORT, encode_cursor, seek_filter
+from models.indexes import ensure_ttl_index
+from models import filter_keys
+
+
+# Arsivde saklanan alanlar (model egitimi ve gecmis analizleri icin yeterli, HTML/ara alanlar yok)
+ARCHIVE_FIELDS = [
+    "ilan_no", "url", "baslik", "marka", "model", "model_detay", "yil", "km", "fiyat", "renk",
+    "yakit", "vites", "boyali_parcalar", "degisen_parcalar", "hasar_puani", "il", "ilce",
+    "ai_tahmin", "created_at", "changed_at", "updated_at"
+]
 
 
 class Database:
     """MongoDB veritabanı yönetim sınıfı"""
 
     _instance = None
-    _client = None
+    # Lazy connection: import sirasinda baglanilmaz; client ilk istekte surec basina
+    # models/connection.py'den alinir (gunicorn fork'undan sonra her worker kendi havuzunu acar).
+    # Indeksler de her surecte ilk baglantida bir kez kontrol edilir (basarisiz olsa bile
+    # tekrar denenmez; her istekte ~20 create_index gidis-donusu yapilmasin).
+    _indexes_pid = None
+    # Filtre bazli toplam sayi onbellegi: {filtre anahtari: (zaman, sayi)}
+    _count_cache = {}
+    _count_lock = threading.Lock()
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
 
-    def __init__(self):
-        # Lazy connection: MongoDB'ye ilk istekte bağlan (worker'ın boot olması için)
-        if Database._client is None:
-            try:
-                Database._client = MongoClient(
-                    MONGO_URI,
-                    server_api=ServerApi('1'),
-                    tlsCAFile=certifi.where(),
-                    serverSelectionTimeoutMS=10000,
-                    connectTimeoutMS=10000
-                )
-                Database._client.admin.command('ping')
-                print("[OK] MongoDB baglantisi basarili")
-                # Indeksleri olustur
-                self._ensure_indexes()
-            except Exception as e:
-                print(f"[HATA] MongoDB baglanti hatasi (ilk istekte tekrar denenecek): {e}")
-                Database._client = None
-
-    def _ensure_indexes(self):
+    def _ensure_indexes(self, client):
         """Performans icin gerekli indeksleri olustur"""
         try:
-            coll = self.vehicles
+            coll = client[DB_NAME][COLLECTION_NAME]
             print("[INFO] Indeksler kontrol ediliyor...")
             
             # Filtreleme ve siralama icin temel indeksler
@@ -59,6 +62,11 @@ class Database:
             coll.create_index([("vites", 1)])
             coll.create_index([("ai_firsat", 1)])
             coll.create_index([("updated_at", -1)])
+            coll.create_index([("changed_at", -1)])
+            # Keyset sayfalama siralamasi (models/pagination.py)
+            coll.create_index([("updated_at", -1), ("_id", -1)])
+            # Normalize filtre anahtarlari + siralama (models/filter_keys.py)
+            filter_keys.ensure_indexes(coll)
             
             # Bilesik indeksler (Hizli filtreleme icin)
             coll.create_index([("marka", 1), ("model", 1)])
@@ -67,29 +75,48 @@ class Database:
             # URL benzersiz olmali
             coll.create_index([("url", 1)], unique=True)
             
+            self._ensure_identity_index(coll)
+            
+            # Fiyat gecmisi: ilan bazli aylik kovalar
+            client[DB_NAME][PRICE_HISTORY_COLLECTION].create_index([("ilan_no", 1), ("month", 1)])
+            
+            # Arsiv: ilan bazli arama ve (ayarliysa) TTL ile son silme
+            archive = client[DB_NAME][ARCHIVE_COLLECTION]
+            archive.create_index([("ilan_no", 1)])
+            if ARCHIVE_TTL_DAYS:
+                # ARCHIVE_TTL_DAYS degisirse sure collMod ile guncellenir
+                ensure_ttl_index(archive, "archived_at", ARCHIVE_TTL_DAYS * 86400)
+            
             print("[OK] Veritabani indeksleri hazir")
+            return True
         except Exception as e:
-            print(f"[UYARI] Indeks olusturma hatasi: {e}")
+            print(f"[UYARI] Indeks olusturma hatasi (bu surecte tekrar denenmeyecek): {e}")
+            return False
+
+    @staticmethod
+    def _ensure_identity_index(coll) -> bool:
+        """
+        Kimlik anahtari ilan_no: scraper bu alanla upsert eder, mukerrer kayit yazimda engellenir
+        (eski, ilan_no'suz kayitlar partial index disinda kalir)
+        """
+        try:
+            coll.create_index([("ilan_no", 1)], unique=True,
+                              partialFilterExpression={"ilan_no": {"$type": "string"}})
+            return True
+        except Exception as e:
+            print(f"[UYARI] ilan_no benzersiz indeksi olusturulamadi, once remove_duplicates() calistirin: {e}")
+            return False
 
     def connect(self):
-        if self._client is None:
-            try:
-                self._client = MongoClient(
-                    MONGO_URI,
-                    server_api=ServerApi('1'),
-                    tlsCAFile=certifi.where(),
-                    serverSelectionTimeoutMS=5000,
-                    connectTimeoutMS=5000
-                )
-                self._client.admin.command('ping')
-                print("[OK] MongoDB baglantisi basarili (via connect method)")
-            except ConnectionFailure as e:
-                print(f"[HATA] MongoDB baglanti hatasi: {e}")
-                raise
-            except Exception as e:
-                print(f"[HATA] MongoDB Baslatma Hatasi: {e}")
-                raise
-        return self._client
+        client = get_client()
+        if Database._indexes_pid != os.getpid():
+            Database._indexes_pid = os.getpid()
+            self._ensure_indexes(client)
+        return client
+
+    def ping(self) -> dict:
+        """Saglik kontrolu (gecikme ve havuz ayarlari)"""
+        return ping()
 
     @property
     def db(self):
@@ -99,12 +126,28 @@ class Database:
     def vehicles(self):
         return self.db[COLLECTION_NAME]
 
+    @property
+    def price_history(self):
+        return self.db[PRICE_HISTORY_COLLECTION]
+
+    @property
+    def archive(self):
+        return self.db[ARCHIVE_COLLECTION]
+
+    @staticmethod
+    def identity_filter(vehicle_data: dict) -> dict:
+        """Aracin kimlik sorgusu: ilan_no (scraper ile ayni anahtar), yoksa url"""
+        if vehicle_data.get("ilan_no"):
+            return {"ilan_no": vehicle_data["ilan_no"]}
+        return {"url": vehicle_data["url"]}
+
     def upsert_vehicle(self, vehicle_data: dict) -> bool:
         if "url" not in vehicle_data:
             return False
         vehicle_data["updated_at"] = datetime.utcnow()
+        vehicle_data.update(filter_keys.filter_keys(vehicle_data))
         result = self.vehicles.update_one(
-            {"url": vehicle_data["url"]},
+            self.identity_filter(vehicle_data),
             {
                 "$set": vehicle_data,
                 "$setOnInsert": {"created_at": datetime.utcnow()}
@@ -122,12 +165,78 @@ class Database:
             cursor = cursor.limit(limit)
         return list(cursor)
 
+    def iter_vehicles(self, filters: dict = None, projection: dict = None, batch_size: int = 1000):
+        """
+        Buyuk isler (AI egitimi/tahmini) icin akis: siralama yok, sadece projeksiyondaki alanlar,
+        batch_size'lik listeler halinde. Bellek kullanimi koleksiyon boyutundan bagimsizdir.
+        """
+        cursor = self.vehicles.find(filters or {}, projection, batch_size=batch_size)
+        try:
+            chunk = []
+            for doc in cursor:
+                chunk.append(doc)
+                if len(chunk) >= batch_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+        finally:
+            cursor.close()
+
+    def get_vehicles_page(self, filters: dict = None, limit: int = 20, cursor: str = None,
+                          projection: dict = None) -> tuple:
+        """
+        Keyset sayfalama: (updated_at, _id) sirasiyla limit kadar arac
+
+        Returns:
+            tuple: (araclar, sonraki sayfanin cursor'i veya None)
+        """
+        query = filters or {}
+        if cursor:
+            query = {"$and": [query, seek_filter(cursor)]} if query else seek_filter(cursor)
+        # Bir fazlasi: sonraki sayfa var mi?
+        docs = list(self.vehicles.find(query, projection).sort(SORT).limit(limit + 1))
+        if len(docs) > limit:
+            docs = docs[:limit]
+            return docs, encode_cursor(docs[-1])
+        return docs, None
+
+    def count_vehicles(self, filters: dict = None, max_age_seconds: int = 60) -> int:
+        """
+        Filtreye uyan arac sayisi; ayni filtre icin max_age_seconds boyunca onbellekten.
+        Filtresiz sayim koleksiyon metadatasindan (estimated_document_count) gelir.
+        """
+        if not filters:
+            return self.vehicles.estimated_document_count()
+        key = json.dumps(filters, sort_keys=True, default=str)
+        now = time.monotonic()
+        cached = Database._count_cache.get(key)
+        if cached is not None and now - cached[0] < max_age_seconds:
+            return cached[1]
+        count = self.vehicles.count_documents(filters)
+        with Database._count_lock:
+            if len(Database._count_cache) > 500:
+                Database._count_cache.clear()
+            Database._count_cache[key] = (now, count)
+        return count
+
     def get_vehicles_by_brand(self, brand: str) -> list:
         return list(self.vehicles.find({"marka": brand}))
 
     def get_vehicles_by_model(self, brand: str, model: str) -> list:
         return list(self.vehicles.find({"marka": brand, "model": model}))
 
+    def get_vehicles_changed_since(self, since: datetime, projection: dict = None) -> list:
+        """Fiyati/km'si verilen tarihten (UTC) sonra degisen veya yeni eklenen araclar"""
+        return list(self.vehicles.find({"changed_at": {"$gte": since}}, projection))
+
+    def get_price_history(self, ilan_no: str) -> list:
+        """Ilanin tum fiyat gecmisi: [{"at", "fiyat", "km"}, ...] (eskiden yeniye)"""
+        points = []
+        for bucket in self.price_history.find({"ilan_no": ilan_no}).sort("month", 1):
+            points.extend({"at": at, "fiyat": fiyat, "km": km} for at, fiyat, km in bucket.get("points", []))
+        return points
+
     def get_firsatlar(self) -> list:
         return list(self.vehicles.find({"ai_firsat": True}).sort("fark", 1))
 
@@ -155,15 +264,21 @@ class Database:
 
     def bulk_update_ai_predictions(self, predictions: list):
         from pymongo import UpdateOne
+        now = datetime.utcnow()
+        # Pipeline update: firsat_at sadece ilan firsata yeni donustugunde yazilir
+        # (canli akis bu alani izler; her AI calismasinda tum firsatlar tekrar bildirilmez)
         operations = [
             UpdateOne(
                 {"url": p["url"]},
-                {"$set": {
+                [{"$set": {
+                    "firsat_at": {"$cond": [
+                        {"$and": [p["ai_firsat"], {"$ne": ["$ai_firsat", True]}]}, now, "$firsat_at"
+                    ]},
                     "ai_tahmin": p["ai_tahmin"],
                     "ai_firsat": p["ai_firsat"],
                     "fark": p["fark"],
-                    "ai_updated_at": datetime.utcnow()
-                }}
+                    "ai_updated_at": now
+                }}]
             )
             for p in predictions
         ]
@@ -172,63 +287,129 @@ class Database:
             print(f"[OK] {result.modified_count} arac icin AI tahmini guncellendi")
 
     def get_stats(self, filters: dict = None) -> dict:
+        """Filtreye gore istatistikler (tek $facet aggregation, filtre bir kez taranir)"""
         query = filters or {}
-        
-        # Toplam araç sayısı (filtreye göre)
-        total = self.vehicles.count_documents(query)
-        
-        # Fırsat sayısı (filtre + ai_firsat)
-        firsat_query = query.copy()
-        firsat_query["ai_firsat"] = True
-        firsatlar = self.vehicles.count_documents(firsat_query)
-        
-        # Marka dağılımı (filtreye göre)
-        brand_pipeline = [
+        pipeline = [
             {"$match": query},
-            {"$group": {"_id": "$marka", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}}
+            {"$facet": {
+                "totals": [
+                    {"$group": {
+                        "_id": None,
+                        "total": {"$sum": 1},
+                        "firsatlar": {"$sum": {"$cond": [{"$eq": ["$ai_firsat", True]}, 1, 0]}}
+                    }}
+                ],
+                # Ortalama fiyat sadece gecerli (sayisal, > 0) fiyatlar uzerinden
+                "avg_price": [
+                    {"$match": {"fiyat": {"$gt": 0}}},
+                    {"$group": {"_id": None, "avg_price": {"$avg": "$fiyat"}}}
+                ],
+                # Materialize dokumanlarla ayni gruplama (normalize anahtar, yoksa "unknown")
+                "brand_distribution": [
+                    {"$group": {"_id": {"$ifNull": ["$marka_key", UNKNOWN_KEY]}, "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1}}
+                ]
+            }}
         ]
-        brand_stats = list(self.vehicles.aggregate(brand_pipeline))
-        
-        # Ortalama fiyat (filtreye göre)
-        avg_match = query.copy()
-        avg_match["fiyat"] = {"$gt": 0}
-        
-        avg_pipeline = [
-            {"$match": avg_match},
-            {"$group": {"_id": None, "avg_price": {"$avg": "$fiyat"}}}
-        ]
-        avg_result = list(self.vehicles.aggregate(avg_pipeline))
-        avg_price = avg_result[0]["avg_price"] if avg_result else 0
+        result = next(self.vehicles.aggregate(pipeline, allowDiskUse=True))
+        totals = result["totals"][0] if result["totals"] else {"total": 0, "firsatlar": 0}
+        avg_price = result["avg_price"][0]["avg_price"] if result["avg_price"] else 0
         
         return {
-            "total": total,
-            "firsatlar": firsatlar,
-            "avg_price": int(avg_price),
-            "brand_distribution": brand_stats
+            "total": totals["total"],
+            "firsatlar": totals["firsatlar"],
+            "avg_price": int(avg_price or 0),
+            "brand_distribution": result["brand_distribution"]
         }
 
-    def remove_duplicates(self) -> int:
+    def get_summary_stats(self, brand: str = None, model: str = None) -> dict:
+        """
+        Filtresiz / marka / marka+model istatistikleri: materialize dokumandan tek okuma,
+        dokuman yoksa veya eskiyse canli $facet sorgusu
+        """
+        keys = filter_keys.key_filters(brand, model)
+        if model and not brand:
+            # Materialize dokumanlar marka altinda tutulur; markasiz model "all"a dusmemeli
+            return self.get_stats(keys)
+        stats = read_stats(self.db, STATS_COLLECTION, keys.get("marka_key"), keys.get("model_key"),
+                           max_age_hours=STATS_MAX_AGE_HOURS)
+        if stats is not None:
+            return stats
+        return self.get_stats(keys)
+
+    def refresh_stats(self, brand: str = None, model: str = None):
+        """Materialize istatistikleri yenile (marka/model verilirse sadece o kapsam)"""
+        refresh_stats(self.db, COLLECTION_NAME, STATS_COLLECTION, brand, model)
+
+    def remove_duplicates(self, batch_size: int = 1000) -> int:
+        """
+        Ayni kimlikteki (ilan_no, yoksa url) kayitlardan en yeni updated_at'li olani birak,
+        digerlerini sil. Aggregation diske tasabilir ve cursor akis halinde okunur;
+        silme islemleri batch_size'lik gruplar halinde yapilir.
+        """
         pipeline = [
-            {"$group": {"_id": "$url", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
-            {"$match": {"count": {"$gt": 1}}}
+            # Grup icindeki ilk _id hayatta kalan kayittir (en yeni updated_at, esitlikte en yeni _id)
+            {"$sort": {"updated_at": -1, "_id": -1}},
+            {"$group": {
+                "_id": {"$ifNull": ["$ilan_no", "$url"]},
+                "ids": {"$push": "$_id"},
+                "count": {"$sum": 1}
+            }},
+            {"$match": {"count": {"$gt": 1}}},
+            {"$project": {"ids": {"$slice": ["$ids", 1, {"$subtract": ["$count", 1]}]}}}
         ]
-        duplicates = list(self.vehicles.aggregate(pipeline))
+        cursor = self.vehicles.aggregate(pipeline, allowDiskUse=True, batchSize=batch_size)
         removed = 0
-        for doc in duplicates:
-            ids_to_remove = doc["ids"][:-1]
-            if ids_to_remove:
-                result = self.vehicles.delete_many({"_id": {"$in": ids_to_remove}})
-                removed += result.deleted_count
-        print(f"[TEMIZLIK] {removed} mukerrer kayit silindi")
+        groups = 0
+        pending = []
+        for doc in cursor:
+            groups += 1
+            pending.extend(doc["ids"])
+            if len(pending) >= batch_size:
+                removed += self.vehicles.delete_many({"_id": {"$in": pending}}).deleted_count
+                pending = []
+                print(f"[TEMIZLIK] {groups} mukerrer grup islendi, {removed} kayit silindi...")
+        if pending:
+            removed += self.vehicles.delete_many({"_id": {"$in": pending}}).deleted_count
+        print(f"[TEMIZLIK] {removed} mukerrer kayit silindi ({groups} grup)")
+        # Mukerrerler yuzunden olusturulamamis olabilir
+        self._ensure_identity_index(self.vehicles)
         return removed
 
-    def remove_old_listings(self, days: int = 30) -> int:
-        from datetime import timedelta
+    def archive_old_listings(self, days: int = RETENTION_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE,
+                             pause_seconds: float = ARCHIVE_BATCH_PAUSE_SECONDS) -> int:
+        """
+        days gunden uzun suredir guncellenmeyen ilanlari arsive tasi ve tum_araclar'dan sil
+
+        Her grup once arsive yazilir (_id korunur, tekrar calismada ayni kayit ustune yazilir),
+        sonra silinir; gruplar arasinda pause_seconds beklenir.
+        """
         cutoff = datetime.utcnow() - timedelta(days=days)
-        result = self.vehicles.delete_many({"updated_at": {"$lt": cutoff}})
-        print(f"[TEMIZLIK] {result.deleted_count} eski ilan silindi ({days} gunden eski)")
-        return result.deleted_count
+        expired = {"updated_at": {"$lt": cutoff}}
+        projection = {field: 1 for field in ARCHIVE_FIELDS}
+        moved = 0
+        while True:
+            batch = list(self.vehicles.find(expired, projection).sort("_id", 1).limit(batch_size))
+            if not batch:
+                break
+            now = datetime.utcnow()
+            self.archive.bulk_write(
+                [ReplaceOne({"_id": doc["_id"]}, dict(doc, archived_at=now), upsert=True) for doc in batch],
+                ordered=False
+            )
+            # Arada yeniden taranmis ilan silinmez (arsivdeki kopyasi zararsizdir)
+            result = self.vehicles.delete_many({"_id": {"$in": [doc["_id"] for doc in batch]}, **expired})
+            moved += result.deleted_count
+            print(f"[TEMIZLIK] {moved} eski ilan arsive tasindi...")
+            if len(batch) < batch_size:
+                break
+            time.sleep(pause_seconds)
+        print(f"[TEMIZLIK] {moved} eski ilan arsive tasindi ({days} gunden eski)")
+        return moved
+
+    def remove_old_listings(self, days: int = RETENTION_DAYS) -> int:
+        """Eski ilanlari temizle (silmeden once arsive tasinir)"""
+        return self.archive_old_listings(days=days)
 
     @property
     def users(self):
@@ -253,10 +434,8 @@ class Database:
         return self.users.find_one({"username": username})
 
     def close(self):
-        if self._client:
-            self._client.close()
-            self._client = None
-            print("[KAPAT] MongoDB baglantisi kapatildi")
+        close_client()
+        print("[KAPAT] MongoDB baglantisi kapatildi")
 
 
 db = Database()
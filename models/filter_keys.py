@@ -0,0 +1,211 @@
+# ========================================
+# EkerGallery - Normalize Filtre Anahtarları
+# ========================================
+#
+# Dashboard filtreleri (marka, model, yakıt, vites) büyük/küçük harf duyarsız regex ve
+# category üzerinde $or ile aranıyordu; bu sorgular indeks kullanamaz. Yazım sırasında
+# kanonik küçük harf anahtarlar (marka_key, model_key, yakit_key, vites_key) eklenir,
+# API bu alanlarda tam eşleşme ile (filtre + sıralama şekline uyan bileşik indekslerle) sorgular.
+#
+# API tam eşleşme ile sorguladığı için anahtarsız eski kayıtlar filtrelerde görünmez; backfill
+# deploy sırasında (update_server.sh / deploy_ec2.sh, servis başlamadan önce) ve gece temizliğinde çalışır.
+#
+# Kullanım:
+#   python models/filter_keys.py backfill   # Eski kayıtlara anahtarları gruplar halinde yaz
+#   python models/filter_keys.py explain    # Sık sorguların planlarını kontrol et
+
+import os
+import re
+import sys
+import time
+import unicodedata
+
+from pymongo import UpdateOne
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import VEHICLE_CATEGORIES
+
+# Alanların şema sürümü; normalizasyon kuralı değişirse artırılır ve backfill tekrar çalışır
+FILTER_KEYS_VERSION = 1
+
+# Filtre + sıralama (updated_at, _id) şekline uyan indeksler
+FILTER_INDEXES = [
+    [("marka_key", 1), ("model_key", 1), ("updated_at", -1), ("_id", -1)],
+    [("marka_key", 1), ("updated_at", -1), ("_id", -1)],
+    # Markasız model filtresi (?model=...)
+    [("model_key", 1), ("updated_at", -1), ("_id", -1)],
+    [("ai_firsat", 1), ("updated_at", -1), ("_id", -1)],
+    [("yakit_key", 1), ("vites_key", 1)],
+]
+
+_TURKISH = str.maketrans("ıİşŞğĞüÜöÖçÇ", "iissgguuoocc")
+
+
+def normalize_key(value):
+    """'Mercedes-Benz' -> 'mercedes-benz', 'Yarı Otomatik' -> 'yari-otomatik'"""
+    if value is None:
+        return None
+    text = unicodedata.normalize("NFKD", str(value).translate(_TURKISH))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = re.sub(r"[^a-z0-9]+", "-", text).strip("-")
+    return text or None
+
+
+def _build_aliases():
+    brands = {}
+    models = {}
+    for brand_key, info in VEHICLE_CATEGORIES.items():
+        for alias in (brand_key, info.get("display_name")):
+            if normalize_key(alias):
+                brands[normalize_key(alias)] = brand_key
+        models[brand_key] = {}
+        for model_key, model_info in info.get("models", {}).items():
+            for alias in (model_key, model_info.get("name")):
+                if normalize_key(alias):
+                    models[brand_key][normalize_key(alias)] = model_key
+    return brands, models
+
+
+# Görünen ad / eski yazımlar -> config anahtarı ("mercedes-benz" -> "mercedes")
+BRAND_ALIASES, MODEL_ALIASES = _build_aliases()
+
+
+def brand_key(value):
+    key = normalize_key(value)
+    return BRAND_ALIASES.get(key, key)
+
+
+def model_key(brand, value):
+    key = normalize_key(value)
+    return MODEL_ALIASES.get(brand, {}).get(key, key)
+
+
+def filter_keys(doc):
+    """Dokümanın normalize filtre alanları (eski kayıtlarda category'den tamamlanır)"""
+    marka = brand_key(doc.get("marka"))
+    model = model_key(marka, doc.get("model"))
+    # Eski kayıtlar: marka/model config'de yoksa category = "<marka_key> <model_key>" kullanılır
+    category = (doc.get("category") or "").split()
+    if len(category) == 2:
+        if marka not in MODEL_ALIASES and brand_key(category[0]) in MODEL_ALIASES:
+            marka = brand_key(category[0])
+        known_models = MODEL_ALIASES.get(marka, {})
+        if model not in known_models.values() and model_key(marka, category[1]) in known_models.values():
+            model = model_key(marka, category[1])
+    return {
+        "marka_key": marka,
+        "model_key": model,
+        "yakit_key": normalize_key(doc.get("yakit")),
+        "vites_key": normalize_key(doc.get("vites")),
+        "filter_keys_v": FILTER_KEYS_VERSION,
+    }
+
+
+def key_filters(brand=None, model=None, fuel=None, transmission=None):
+    """API parametrelerinden tam eşleşme sorgusu (kullanıcı girdisi regex'e girmez)"""
+    query = {}
+    brand = brand_key(brand) if brand else None
+    if brand:
+        query["marka_key"] = brand
+    if model:
+        query["model_key"] = model_key(brand, model)
+    if fuel:
+        query["yakit_key"] = normalize_key(fuel)
+    if transmission:
+        query["vites_key"] = normalize_key(transmission)
+    return query
+
+
+def ensure_indexes(collection):
+    for keys in FILTER_INDEXES:
+        collection.create_index(keys)
+
+
+def backfill_filter_keys(collection, batch_size=1000, pause_seconds=0.2):
+    """Anahtarları eksik veya eski sürümlü kayıtlara gruplar halinde yaz; güncellenen sayısını döndür"""
+    missing = {"filter_keys_v": {"$ne": FILTER_KEYS_VERSION}}
+    projection = {"marka": 1, "model": 1, "yakit": 1, "vites": 1, "category": 1}
+    updated = 0
+    last_id = None
+    while True:
+        query = dict(missing, _id={"$gt": last_id}) if last_id is not None else missing
+        batch = list(collection.find(query, projection).sort("_id", 1).limit(batch_size))
+        if not batch:
+            break
+        result = collection.bulk_write(
+            [UpdateOne({"_id": doc["_id"]}, {"$set": filter_keys(doc)}) for doc in batch],
+            ordered=False
+        )
+        updated += result.modified_count
+        last_id = batch[-1]["_id"]
+        print(f"[BACKFILL] {updated} kayit guncellendi...")
+        time.sleep(pause_seconds)
+    print(f"[BACKFILL] Tamamlandi: {updated} kayit")
+    return updated
+
+
+# Sık kullanılan sorgu şekilleri: (ad, filtre, index-only beklenir mi)
+HOT_QUERIES = [
+    ("count marka", {"marka_key": "bmw"}, True),
+    ("count marka+model", {"marka_key": "bmw", "model_key": "3-serisi"}, True),
+    ("count model", {"model_key": "3-serisi"}, True),
+    ("count firsat", {"ai_firsat": True}, True),
+    ("page marka", {"marka_key": "bmw"}, False),
+    ("page marka+model", {"marka_key": "bmw", "model_key": "3-serisi"}, False),
+    ("page model", {"model_key": "3-serisi"}, False),
+    ("page firsat", {"ai_firsat": True}, False),
+]
+
+
+def _stages(plan):
+    stages = [plan.get("stage")]
+    for child in [plan.get("inputStage")] + plan.get("inputStages", []):
+        if child:
+            stages.extend(_stages(child))
+    return stages
+
+
+def explain_hot_queries(collection):
+    """
+    Sık sorguların kazanan planlarını kontrol et
+
+    Sayımlar index-only (COUNT_SCAN / FETCH'siz IXSCAN) olmalı; sayfa sorguları
+    IXSCAN kullanmalı ve bellek içi SORT yapmamalı.
+
+    Returns:
+        list: [{"name", "stages", "ok"}, ...]
+    """
+    from models.pagination import SORT
+
+    results = []
+    for name, query, index_only in HOT_QUERIES:
+        if index_only:
+            explain = collection.database.command(
+                "explain", {"count": collection.name, "query": query}, verbosity="queryPlanner"
+            )
+        else:
+            explain = collection.find(query, {"_id": 1}).sort(SORT).limit(20).explain()
+        plan = explain["queryPlanner"]["winningPlan"]
+        # Yeni sürümlerde (SBE) plan queryPlan altında
+        stages = _stages(plan.get("queryPlan", plan))
+        if index_only:
+            ok = "COLLSCAN" not in stages and "FETCH" not in stages
+        else:
+            ok = "IXSCAN" in stages and "SORT" not in stages and "COLLSCAN" not in stages
+        results.append({"name": name, "stages": stages, "ok": ok})
+    return results
+
+
+if __name__ == "__main__":
+    from models.database import db
+
+    action = sys.argv[1] if len(sys.argv) > 1 else "explain"
+    if action == "backfill":
+        ensure_indexes(db.vehicles)
+        backfill_filter_keys(db.vehicles)
+    else:
+        failed = 0
+        for row in explain_hot_queries(db.vehicles):
+            print(f"[{'OK' if row['ok'] else 'HATA'}] {row['name']}: {' <- '.join(s for s in row['stages'] if s)}")
+            failed += not row["ok"]
+        sys.exit(1 if failed else 0)
@@ -0,0 +1,41 @@
+# ========================================
+# EkerGallery - İndeks Yardımcıları
+# ========================================
+#
+# TTL indeksleri: süre ayarı (ör. ARCHIVE_TTL_DAYS) değişince create_index aynı anahtarda
+# farklı expireAfterSeconds ile IndexOptionsConflict verir. Bu durumda indeks silinip
+# yeniden kurulmaz; süre collMod ile yerinde güncellenir.
+
+import logging
+
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# IndexOptionsConflict / IndexKeySpecsConflict
+_CONFLICT_CODES = {85, 86}
+
+
+def ensure_ttl_index(collection, field, seconds):
+    """
+    field üzerinde seconds süreli TTL indeksi (varsa süresi güncellenir)
+
+    Returns:
+        bool: indeks istenen süreyle hazır mı (collMod da başarısızsa False, hata loglanır)
+    """
+    try:
+        collection.create_index([(field, 1)], expireAfterSeconds=seconds)
+        return True
+    except OperationFailure as e:
+        if e.code not in _CONFLICT_CODES:
+            raise
+    try:
+        collection.database.command(
+            "collMod", collection.name,
+            index={"keyPattern": {field: 1}, "expireAfterSeconds": seconds}
+        )
+        logger.info(f"TTL of {collection.name}.{field} updated to {seconds}s")
+        return True
+    except OperationFailure as e:
+        logger.error(f"TTL index conflict on {collection.name}.{field}, could not update it: {e}")
+        return False
@@ -0,0 +1,234 @@
+# ========================================
+# EkerGallery - Canlı Fırsat Akışı
+# ========================================
+#
+# Dashboard'lara Server-Sent Events (/api/stream) ile yeni/değişen fırsat ilanlarını
+# (ai_firsat: true) ve istatistik değişimlerini iter. Her süreçte (gunicorn worker) tek bir
+# izleyici thread'i vardır; olaylar bağlı istemcilerin kuyruklarına dağıtılır.
+#
+# Kaynak MongoDB change stream'idir (replica set gerekir). Change stream desteklenmiyorsa
+# (tek sunuculu mongod) firsat_at / changed_at alanlarını izleyen bir yoklayıcıya düşülür.
+#
+# Yerelde tek düğümlü replica set ile deneme:
+#   mongod --replSet rs0 --dbpath /tmp/rs0 --port 27017
+#   mongosh --eval "rs.initiate()"
+#   MONGO_URI="mongodb://localhost:27017/?replicaSet=rs0" python models/live_feed.py
+#   (başka terminalde) mongosh sahibinden_data --eval 'db.tum_araclar.updateOne({}, {$set: {ai_firsat: true, fiyat: 1}})'
+
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from queue import Queue, Full, Empty
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import LIVE_FEED_POLL_SECONDS, LIVE_FEED_STATS_SECONDS, LIVE_FEED_IDLE_SECONDS
+from config import LIVE_FEED_CLIENT_QUEUE
+
+logger = logging.getLogger(__name__)
+
+# İstemciye gönderilen ilan alanları
+FEED_FIELDS = ["ilan_no", "baslik", "url", "marka", "model", "yil", "km", "fiyat",
+               "ai_tahmin", "fark", "il", "ilce", "firsat_at", "changed_at", "updated_at"]
+
+# Change stream'in hiç desteklenmediği durumlar (tek sunucu: 40573) ve
+# devam noktasının kaybolduğu durumlar (ChangeStreamFatalError / HistoryLost)
+_UNSUPPORTED_CODES = {40573}
+_RESUME_LOST_CODES = {280, 286}
+
+
+def _feed_vehicle(doc):
+    vehicle = {field: doc.get(field) for field in FEED_FIELDS}
+    vehicle["_id"] = str(doc.get("_id"))
+    return vehicle
+
+
+class LiveFeed:
+    """
+    Süreç başına tek izleyici, çok istemci.
+
+    subscribe() ile alınan kuyruktan (event, data) çiftleri okunur; yavaş istemcinin
+    kuyruğu dolarsa en eski olay atılır. Abone kalmayınca izleyici idle_seconds sonra durur,
+    yeni abonelikte (fork sonrası dahil) yeniden başlar.
+
+    Args:
+        collection_getter: araç koleksiyonunu döndüren fonksiyon (bağlantı tembel kurulur)
+        stats_getter: genel istatistikleri döndüren fonksiyon (materialize doküman okuması)
+    """
+
+    def __init__(self, collection_getter, stats_getter, poll_seconds=LIVE_FEED_POLL_SECONDS,
+                 stats_seconds=LIVE_FEED_STATS_SECONDS, idle_seconds=LIVE_FEED_IDLE_SECONDS,
+                 queue_size=LIVE_FEED_CLIENT_QUEUE):
+        self.collection_getter = collection_getter
+        self.stats_getter = stats_getter
+        self.poll_seconds = poll_seconds
+        self.stats_seconds = stats_seconds
+        self.idle_seconds = idle_seconds
+        self.queue_size = queue_size
+        self.mode = None  # "change_stream" | "poll"
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._resume_token = None
+        self._last_stats = None
+        self._next_stats_at = 0
+        self._idle_since = None
+
+    # --- Abonelik ---
+
+    def subscribe(self):
+        queue = Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.add(queue)
+            self._ensure_started()
+        if self._last_stats is not None:
+            queue.put_nowait(("stats", self._last_stats))
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._subscribers.discard(queue)
+
+    def _ensure_started(self):
+        # Fork edilen süreçte ebeveynin thread'i yoktur
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._idle_since = None
+        self._thread = threading.Thread(target=self._run, name="live-feed", daemon=True)
+        self._thread.start()
+
+    def publish(self, event, data):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for queue in subscribers:
+            try:
+                queue.put_nowait((event, data))
+            except Full:
+                # Yavaş istemci: en eski olayı at
+                try:
+                    queue.get_nowait()
+                    queue.put_nowait((event, data))
+                except (Empty, Full):
+                    pass
+
+    # --- İzleyici ---
+
+    def _should_stop(self):
+        with self._lock:
+            if self._subscribers:
+                self._idle_since = None
+                return False
+            self._idle_since = self._idle_since or time.monotonic()
+            if time.monotonic() - self._idle_since < self.idle_seconds:
+                return False
+            # Kilit altında: bu arada abone gelirse _ensure_started yeni thread açar
+            self._thread = None
+            return True
+
+    def _run(self):
+        while True:
+            try:
+                if self.mode != "poll":
+                    self.mode = "change_stream"
+                    self._watch()
+                else:
+                    self._poll()
+                return
+            except OperationFailure as e:
+                if e.code in _UNSUPPORTED_CODES:
+                    logger.warning(f"Change streams unavailable ({e}), falling back to polling")
+                    self.mode = "poll"
+                    continue
+                if e.code in _RESUME_LOST_CODES:
+                    self._resume_token = None
+                logger.warning(f"Live feed error: {e}")
+            except PyMongoError as e:
+                logger.warning(f"Live feed error: {e}")
+            except Exception as e:
+                logger.error(f"Live feed error: {e}")
+            if self._should_stop():
+                return
+            time.sleep(self.poll_seconds)
+
+    def _watch(self):
+        """Change stream: eklenen/değişen ve fırsat olan ilanlar"""
+        pipeline = [{"$match": {
+            "fullDocument.ai_firsat": True,
+            "$or": [
+                {"operationType": {"$in": ["insert", "replace"]}},
+                # Sadece zaman damgası güncellemeleri (touch, AI tekrar hesaplama) olay üretmez
+                {"updateDescription.updatedFields.ai_firsat": {"$exists": True}},
+                {"updateDescription.updatedFields.fiyat": {"$exists": True}},
+            ]
+        }}]
+        with self.collection_getter().watch(pipeline, full_document="updateLookup", max_await_time_ms=1000,
+                                            resume_after=self._resume_token) as stream:
+            while stream.alive:
+                # Değişiklik yoksa sunucu en fazla max_await_time_ms bekleyip None döndürür
+                change = stream.try_next()
+                if change is not None:
+                    self._resume_token = stream.resume_token
+                    self.publish("firsat", _feed_vehicle(change["fullDocument"]))
+                    continue
+                self._tick()
+                if self._should_stop():
+                    return
+
+    def _poll(self):
+        """Yedek: fırsat olma zamanı (firsat_at) veya fiyat değişimi (changed_at) üzerinden tail"""
+        since = datetime.utcnow()
+        projection = {field: 1 for field in FEED_FIELDS}
+        while True:
+            query = {"ai_firsat": True, "$or": [
+                {"firsat_at": {"$gt": since}},
+                {"changed_at": {"$gt": since}},
+            ]}
+            newest = since
+            for doc in self.collection_getter().find(query, projection):
+                self.publish("firsat", _feed_vehicle(doc))
+                for field in ("firsat_at", "changed_at"):
+                    if isinstance(doc.get(field), datetime) and doc[field] > newest:
+                        newest = doc[field]
+            since = newest
+            self._tick()
+            if self._should_stop():
+                return
+            time.sleep(self.poll_seconds)
+
+    def _tick(self):
+        """İstatistik değiştiyse farkıyla birlikte yayınla"""
+        if time.monotonic() < self._next_stats_at:
+            return
+        self._next_stats_at = time.monotonic() + self.stats_seconds
+        stats = self.stats_getter()
+        current = {"total": stats["total"], "firsatlar": stats["firsatlar"], "avg_price": stats["avg_price"]}
+        previous = self._last_stats
+        if previous is not None and all(previous[k] == current[k] for k in ("total", "firsatlar", "avg_price")):
+            return
+        current["delta"] = {k: current[k] - previous[k] for k in ("total", "firsatlar")} if previous else None
+        self._last_stats = current
+        self.publish("stats", current)
+
+
+if __name__ == "__main__":
+    # Akışı terminalde izle (yerel replica set denemesi)
+    import json
+    from models.database import db
+
+    logging.basicConfig(level=logging.INFO)
+    feed = LiveFeed(lambda: db.vehicles, db.get_summary_stats, stats_seconds=5)
+    subscriber = feed.subscribe()
+    while True:
+        try:
+            event, data = subscriber.get(timeout=10)
+            print(event, json.dumps(data, default=str, ensure_ascii=False))
+        except Empty:
+            print(f"... ({feed.mode})")
+        except KeyboardInterrupt:
+            break
@@ -0,0 +1,55 @@
+# ========================================
+# EkerGallery - Keyset (Seek) Sayfalama
+# ========================================
+#
+# skip() derin sayfalarda atlanan tüm dokümanları tarar; bunun yerine sıralama anahtarının
+# (updated_at, _id) son değeri opak bir cursor olarak istemciye verilir ve sonraki sayfa
+# indeks üzerinde doğrudan o noktadan başlar. Sayfa 500 de sayfa 1 kadar ucuzdur.
+# Gerekli indeks: (updated_at -1, _id -1)
+
+import base64
+import json
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import DESCENDING
+
+SORT = [("updated_at", DESCENDING), ("_id", DESCENDING)]
+
+
+class InvalidCursor(ValueError):
+    """Çözülemeyen veya bozuk cursor"""
+
+
+def encode_cursor(doc):
+    """Sayfanın son dokümanından sonraki sayfanın cursor'ı"""
+    updated_at = doc.get("updated_at")
+    payload = {
+        "u": updated_at.isoformat() if isinstance(updated_at, datetime) else None,
+        "i": str(doc["_id"]),
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        updated_at = datetime.fromisoformat(payload["u"]) if payload.get("u") else None
+        doc_id = ObjectId(payload["i"]) if ObjectId.is_valid(payload["i"]) else payload["i"]
+        return updated_at, doc_id
+    except Exception as e:
+        raise InvalidCursor(f"Gecersiz cursor: {e}")
+
+
+def seek_filter(cursor):
+    """Cursor'dan sonra gelen dokümanlar (SORT sırasına göre)"""
+    updated_at, doc_id = decode_cursor(cursor)
+    if updated_at is None:
+        # updated_at'siz kayıtlar azalan sıralamada en sonda gelir
+        return {"updated_at": None, "_id": {"$lt": doc_id}}
+    return {"$or": [
+        {"updated_at": {"$lt": updated_at}},
+        {"updated_at": updated_at, "_id": {"$lt": doc_id}},
+        {"updated_at": None},
+    ]}
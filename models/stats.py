@@ -0,0 +1,145 @@
+# ========================================
+# EkerGallery - Materialize İstatistikler
+# ========================================
+#
+# Dashboard'un açılış istatistikleri (toplam, fırsat, ortalama fiyat, marka dağılımı)
+# her istekte hesaplanmak yerine "stats" koleksiyonunda tutulur ve _id ile tek okumayla gelir:
+#   "all"                  -> genel toplamlar + marka dağılımı
+#   "brand:<marka>"        -> marka toplamları
+#   "model:<marka>/<model>" -> model toplamları
+#
+# Scraper her kategori taramasından sonra sadece o marka/modeli, AI işi tahminlerden sonra
+# tümünü yeniler; marka ve genel dokümanlar model dokümanlarından toplanır.
+#
+# Henüz normalize anahtarı olmayan (backfill edilmemiş) kayıtlar "unknown" kovasında sayılır;
+# böylece genel toplamlar /api/vehicles sayımı ve canlı $facet sorgusuyla aynı kalır.
+
+from datetime import datetime
+
+# marka_key / model_key'i olmayan kayıtların kovası
+UNKNOWN_KEY = "unknown"
+
+
+def stats_id(brand=None, model=None):
+    if brand and model:
+        return f"model:{brand}/{model}"
+    if brand:
+        return f"brand:{brand}"
+    return "all"
+
+
+def _summary(row):
+    return {
+        "total": row["total"],
+        "firsatlar": row["firsatlar"],
+        "price_sum": row["price_sum"],
+        "price_count": row["price_count"],
+        "avg_price": int(row["price_sum"] / row["price_count"]) if row["price_count"] else 0,
+    }
+
+
+def _totals_group(key):
+    return {
+        "_id": key,
+        "total": {"$sum": "$total"},
+        "firsatlar": {"$sum": "$firsatlar"},
+        "price_sum": {"$sum": "$price_sum"},
+        "price_count": {"$sum": "$price_count"},
+    }
+
+
+def refresh_stats(mongo_db, vehicles, stats, brand=None, model=None):
+    """
+    Model dokümanlarını araç koleksiyonundan yeniden hesapla (brand/model verilirse sadece o kapsam),
+    ardından marka ve genel dokümanları model dokümanlarından topla.
+
+    Args:
+        mongo_db: pymongo Database
+        vehicles: araç koleksiyonu adı
+        stats: istatistik koleksiyonu adı
+    """
+    coll = mongo_db[stats]
+    now = datetime.utcnow()
+    scope = {}
+    if brand:
+        scope["marka_key"] = brand
+    if model:
+        scope["model_key"] = model
+
+    # find() sorgusundaki {"fiyat": {"$gt": 0}} gibi sadece sayısal fiyatlar
+    priced = {"$and": [{"$isNumber": "$fiyat"}, {"$gt": ["$fiyat", 0]}]}
+    rows = mongo_db[vehicles].aggregate([
+        {"$match": scope},
+        {"$group": {
+            "_id": {"marka": {"$ifNull": ["$marka_key", UNKNOWN_KEY]},
+                    "model": {"$ifNull": ["$model_key", UNKNOWN_KEY]}},
+            "total": {"$sum": 1},
+            "firsatlar": {"$sum": {"$cond": [{"$eq": ["$ai_firsat", True]}, 1, 0]}},
+            "price_sum": {"$sum": {"$cond": [priced, "$fiyat", 0]}},
+            "price_count": {"$sum": {"$cond": [priced, 1, 0]}},
+        }}
+    ], allowDiskUse=True)
+    live_ids = []
+    for row in rows:
+        marka, model_key = row["_id"]["marka"], row["_id"]["model"]
+        live_ids.append(stats_id(marka, model_key))
+        coll.replace_one(
+            {"_id": live_ids[-1]},
+            dict(_summary(row), kind="model", marka=marka, model=model_key, updated_at=now),
+            upsert=True
+        )
+    # Kapsamda artık ilanı kalmayan modeller (zamana göre değil: paralel yenilemeler birbirinin
+    # yeni yazdığı dokümanları silmesin)
+    stale = {"kind": "model", "_id": {"$nin": live_ids}}
+    stale.update({f: v for f, v in (("marka", brand), ("model", model)) if v})
+    coll.delete_many(stale)
+
+    # Marka ve genel toplamlar (küçük koleksiyon üzerinde toplama)
+    brand_rows = list(coll.aggregate([
+        {"$match": {"kind": "model"}},
+        {"$group": _totals_group("$marka")},
+    ]))
+    for row in brand_rows:
+        coll.replace_one(
+            {"_id": stats_id(row["_id"])},
+            dict(_summary(row), kind="brand", marka=row["_id"], updated_at=now),
+            upsert=True
+        )
+    # Modeli kalmayan markalar: zamana göre silinmez (paralel worker'ların yeni yazdığı
+    # dokümanlar silinmesin), sadece yenilenen kapsamda ve model dokümanı olmayanlar
+    live_brands = [row["_id"] for row in brand_rows]
+    if brand:
+        if brand not in live_brands:
+            coll.delete_one({"_id": stats_id(brand)})
+    else:
+        coll.delete_many({"kind": "brand", "marka": {"$nin": live_brands}})
+
+    totals = {"total": 0, "firsatlar": 0, "price_sum": 0, "price_count": 0}
+    for row in brand_rows:
+        for field in totals:
+            totals[field] += row[field]
+    distribution = sorted(({"_id": row["_id"], "count": row["total"]} for row in brand_rows),
+                          key=lambda item: -item["count"])
+    coll.replace_one(
+        {"_id": "all"},
+        dict(_summary(totals), kind="all", brand_distribution=distribution, updated_at=now),
+        upsert=True
+    )
+
+
+def read_stats(mongo_db, stats, brand=None, model=None, max_age_hours=None):
+    """Materialize istatistik dokümanı (yoksa veya max_age_hours'tan eskiyse None)"""
+    doc = mongo_db[stats].find_one({"_id": stats_id(brand, model)})
+    if doc is None:
+        return None
+    if max_age_hours and (datetime.utcnow() - doc["updated_at"]).total_seconds() > max_age_hours * 3600:
+        return None
+    distribution = doc.get("brand_distribution")
+    if distribution is None:
+        distribution = [{"_id": doc["marka"], "count": doc["total"]}]
+    return {
+        "total": doc["total"],
+        "firsatlar": doc["firsatlar"],
+        "avg_price": doc["avg_price"],
+        "brand_distribution": distribution,
+    }
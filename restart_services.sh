@@ -11,7 +11,7 @@ cd /home/ubuntu/EkerGallery
 source myenv/bin/activate
 
 echo "Starting Web App..."
-nohup gunicorn -w 4 -b 0.0.0.0:5000 app_v2:app > logs/webapp.log 2>&1 &
+nohup gunicorn -w 4 -k gthread --threads 16 -b 0.0.0.0:5000 app_v2:app > logs/webapp.log 2>&1 &
 
 echo "Starting Scraper (Headful with Xvfb)..."
 nohup xvfb-run -a --server-args="-screen 0 1920x1080x24" python3 services/scraper_v2.py > logs/scraper.log 2>&1 &
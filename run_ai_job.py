@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
+import argparse
 import sys
 import time
 import os
+from datetime import datetime, timedelta
 
 # Set up environment
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -9,13 +11,14 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from models.database import db
 from services.ai_model import price_model
 
-def run_job():
+def run_job(since_hours=None):
     print("🚀 AI Güncelleme İşlemi Başlatıldı...")
     start_time = time.time()
     
     try:
-        # Update all predictions
-        price_model.update_all_predictions()
+        # Update all predictions (or only listings changed in the last N hours)
+        changed_since = datetime.utcnow() - timedelta(hours=since_hours) if since_hours else None
+        price_model.update_all_predictions(changed_since=changed_since)
         
         duration = time.time() - start_time
         print(f"✅ İşlem tamamlandı. Süre: {duration:.2f} saniye")
@@ -25,4 +28,8 @@ def run_job():
         sys.exit(1)
 
 if __name__ == "__main__":
-    run_job()
+    parser = argparse.ArgumentParser(description="AI tahminlerini güncelle")
+    parser.add_argument("--since-hours", type=float, default=None,
+                        help="Sadece son N saatte fiyatı/km'si değişen araçları güncelle")
+    args = parser.parse_args()
+    run_job(since_hours=args.since_hours)
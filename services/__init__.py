@@ -1,3 +1,11 @@
 # Services package
-from .ai_model import price_model, PricePredictionModel
-from .scraper_v2 import VehicleScraper
+# Alt modüller doğrudan import edilir (from services.x import ...). Paket import'u hafif
+# tutulur: scraper her başlangıçta AI modelini (pandas/sklearn/pickle) yüklemez.
+
+
+def __getattr__(name):
+    # Geriye uyumluluk: from services import price_model
+    if name in ("price_model", "PricePredictionModel"):
+        from . import ai_model
+        return getattr(ai_model, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -18,6 +18,11 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import ML_FEATURES, ML_CATEGORICAL, FIRSAT_THRESHOLD
 from models.database import db
 
+# Eğitim ve tahmin için veritabanından okunan alanlar (tam doküman yerine)
+ML_PROJECTION = {field: 1 for field in ML_FEATURES + ML_CATEGORICAL + ["fiyat", "url"]}
+ML_PROJECTION["_id"] = 0
+ML_BATCH_SIZE = 2000
+
 
 class PricePredictionModel:
     """Araç fiyat tahmin modeli"""
@@ -114,35 +119,38 @@ class PricePredictionModel:
         """
         print("🧠 AI modeli eğitiliyor...")
         
-        # Verileri çek
-        vehicles = db.get_all_vehicles({"fiyat": {"$gt": 100000}})
+        # Verileri parça parça çek; bellekte sadece özellik tablosu birikir
+        frames = []
+        total = 0
+        for chunk in db.iter_vehicles({"fiyat": {"$gt": 100000}}, ML_PROJECTION, batch_size=ML_BATCH_SIZE):
+            total += len(chunk)
+            data = []
+            for v in chunk:
+                try:
+                    features = self._prepare_features(v)
+                    features["fiyat"] = v.get("fiyat", 0)
+                    
+                    # Geçersiz verileri atla
+                    if features["yil"] < 1990 or features["fiyat"] < 50000:
+                        continue
+                        
+                    data.append(features)
+                except:
+                    continue
+            if data:
+                frames.append(pd.DataFrame(data))
         
-        if len(vehicles) < min_samples:
-            print(f"⚠️ Yetersiz veri: {len(vehicles)} < {min_samples}. Basit tahmin kullanılacak.")
+        if total < min_samples:
+            print(f"⚠️ Yetersiz veri: {total} < {min_samples}. Basit tahmin kullanılacak.")
             self.is_trained = False
             return False
         
-        # DataFrame oluştur
-        data = []
-        for v in vehicles:
-            try:
-                features = self._prepare_features(v)
-                features["fiyat"] = v.get("fiyat", 0)
-                
-                # Geçersiz verileri atla
-                if features["yil"] < 1990 or features["fiyat"] < 50000:
-                    continue
-                    
-                data.append(features)
-            except:
-                continue
-        
-        if len(data) < min_samples:
+        if sum(len(f) for f in frames) < min_samples:
             print(f"⚠️ Geçerli veri yetersiz. Basit tahmin kullanılacak.")
             self.is_trained = False
             return False
         
-        df = pd.DataFrame(data)
+        df = pd.concat(frames, ignore_index=True)
         
         # Özellikler ve hedef
         feature_cols = ML_FEATURES + ML_CATEGORICAL
@@ -242,6 +250,20 @@ class PricePredictionModel:
             print(f"⚠️ ML Hatası, simple predict deneniyor: {e}")
             return self._simple_predict(vehicle)
     
+    def _predict_many(self, vehicles: list) -> list:
+        """Parça için tek seferde (vektörel) tahmin; hata olursa araç araç tahmine düşer"""
+        if not vehicles:
+            return []
+        if self.is_trained:
+            try:
+                feature_cols = ML_FEATURES + ML_CATEGORICAL
+                df = pd.DataFrame([self._prepare_features(v) for v in vehicles])[feature_cols]
+                predictions = self.model.predict(self._encode_features(df, fit=False))
+                return [int(max(0, p)) for p in predictions]
+            except Exception as e:
+                print(f"⚠️ Toplu tahmin hatası, tek tek deneniyor: {e}")
+        return [self.predict(v) for v in vehicles]
+
     def predict_batch(self, vehicles: list) -> list:
         """
         Toplu fiyat tahmini
@@ -258,14 +280,12 @@ class PricePredictionModel:
             # So we don't need to return [] here, just let the loop run
         
         results = []
+        candidates = [v for v in vehicles if isinstance(v.get("fiyat"), (int, float)) and v["fiyat"] >= 10000]
+        tahminler = self._predict_many(candidates)
         
-        for v in vehicles:
+        for v, tahmin in zip(candidates, tahminler):
             try:
                 fiyat = v.get("fiyat", 0)
-                if fiyat < 10000:
-                    continue
-                
-                tahmin = self.predict(v)
                 if tahmin <= 0:
                     continue
                 
@@ -283,26 +303,45 @@ class PricePredictionModel:
         
         return results
     
-    def update_all_predictions(self):
-        """Tüm araçlar için AI tahminlerini güncelle ve veritabanına kaydet"""
+    def update_all_predictions(self, changed_since=None):
+        """
+        AI tahminlerini güncelle ve veritabanına kaydet
+        
+        changed_since verilirse (UTC datetime) sadece o tarihten beri fiyatı/km'si
+        değişen (changed_at) veya henüz tahmini olmayan araçlar güncellenir.
+        """
         print("🔄 AI tahminleri güncelleniyor...")
         
+        query = {"fiyat": {"$gt": 50000}}
+        if changed_since is not None:
+            query["$or"] = [
+                {"changed_at": {"$gte": changed_since}},
+                {"ai_tahmin": {"$exists": False}}
+            ]
+            if not db.vehicles.count_documents(query, limit=1):
+                print(f"✅ {changed_since:%Y-%m-%d %H:%M} sonrası değişen araç yok, tahmin atlandı")
+                return
+        
         # Önce modeli eğit (varsa güncelle)
         self.train()
         
-        # Tüm araçları çek
-        vehicles = db.get_all_vehicles({"fiyat": {"$gt": 50000}})
-        print(f"📊 {len(vehicles)} araç için tahmin yapılacak")
-        
-        # Tahminleri yap
-        predictions = self.predict_batch(vehicles)
+        # Tahmin yapılacak araçları parça parça çek, tahmin et ve kaydet
+        scanned = 0
+        predicted = 0
+        firsatlar = 0
+        for chunk in db.iter_vehicles(query, ML_PROJECTION, batch_size=ML_BATCH_SIZE):
+            scanned += len(chunk)
+            predictions = self.predict_batch(chunk)
+            if predictions:
+                db.bulk_update_ai_predictions(predictions)
+                predicted += len(predictions)
+                firsatlar += sum(1 for p in predictions if p["ai_firsat"])
+            print(f"📊 {scanned} araç işlendi...")
         
-        # Veritabanına kaydet
-        if predictions:
-            db.bulk_update_ai_predictions(predictions)
-            # İstatistik
-            firsatlar = sum(1 for p in predictions if p["ai_firsat"])
-            print(f"✅ Tahmin tamamlandı: {len(predictions)} araç, {firsatlar} fırsat")
+        if predicted:
+            # Fırsat sayıları değişti: dashboard istatistiklerini yenile
+            db.refresh_stats()
+            print(f"✅ Tahmin tamamlandı: {predicted} araç, {firsatlar} fırsat")
         else:
             print("⚠️ Hiçbir tahmin yapılamadı")
 
@@ -0,0 +1,83 @@
+"""
+EkerGallery - Toplu Yazıcı
+Scraper'ın tek tek update_one çağrıları yerine işlemleri biriktirip
+sırasız (unordered) bulk_write grupları halinde MongoDB'ye gönderir.
+"""
+
+import logging
+import time
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+
+class BulkUpsertBuffer:
+    """
+    Yazma işlemlerini biriktiren tampon.
+
+    Boyut veya yaş eşiği aşılınca otomatik, flush() çağrılınca elle boşaltılır.
+    Context manager olarak kullanıldığında çıkışta (hata olsa bile) kalanlar yazılır.
+    """
+
+    def __init__(self, collection, batch_size=100, max_age_seconds=30):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.max_age_seconds = max_age_seconds
+        self._ops = []
+        self._first_added_at = None
+        self.inserted = 0
+        self.modified = 0
+        self.unchanged = 0
+        self.errors = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+        return False
+
+    def __len__(self):
+        return len(self._ops)
+
+    def add(self, operation):
+        """İşlem ekle; eşik aşıldıysa yaz"""
+        if not self._ops:
+            self._first_added_at = time.monotonic()
+        self._ops.append(operation)
+        if len(self._ops) >= self.batch_size or self._is_stale():
+            self.flush()
+
+    def _is_stale(self):
+        return (self._first_added_at is not None
+                and time.monotonic() - self._first_added_at >= self.max_age_seconds)
+
+    def flush(self):
+        """Biriken işlemleri tek bulk_write ile gönder"""
+        if not self._ops:
+            return
+        ops, self._ops = self._ops, []
+        self._first_added_at = None
+        try:
+            result = self.collection.bulk_write(ops, ordered=False)
+            self._count(result.upserted_count, result.modified_count, result.matched_count)
+        except BulkWriteError as e:
+            # Sırasız yazımda hatalı olmayan işlemler yine uygulanır
+            details = e.details or {}
+            self._count(details.get("nUpserted", 0), details.get("nModified", 0), details.get("nMatched", 0))
+            failed = len(details.get("writeErrors", []))
+            self.errors += failed
+            logger.error(f"Bulk write: {failed} of {len(ops)} operations failed")
+        except Exception as e:
+            self.errors += len(ops)
+            logger.error(f"Bulk write failed ({len(ops)} operations): {e}")
+
+    def _count(self, upserted, modified, matched):
+        self.inserted += upserted
+        self.modified += modified
+        self.unchanged += matched - modified
+
+    def summary(self):
+        return (f"{self.inserted} inserted, {self.modified} modified, "
+                f"{self.unchanged} unchanged, {self.errors} failed")
@@ -0,0 +1,155 @@
+"""
+EkerGallery - Tarama Sınırı (Crawl Frontier)
+Bir taramanın hangi kategori/sayfa/ilan birimlerini bitirdiğini MongoDB'de
+tutar; scraper çöker veya sunucu yeniden başlarsa --resume ile kalınan
+yerden devam edilir.
+
+Doküman yapısı (crawl_frontier koleksiyonu):
+    {"_id": "<run_id>:<kind>:<key>", "run_id", "kind", "key", "status", "updated_at"}
+
+kind: "run" | "category" | "page" | "listing"
+status: "pending" | "in_progress" | "done"
+
+Biten çalışmanın birim dokümanları finish() ile silinir, sadece "run" başlığı kalır.
+Yarım kalıp devam ettirilmeyen çalışmalar ve eski başlıklar ttl_days boyunca
+güncellenmezse updated_at üzerindeki TTL indeksiyle düşer.
+"""
+
+import logging
+from datetime import datetime
+
+from pymongo import UpdateOne, DESCENDING
+
+from models.indexes import ensure_ttl_index
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+IN_PROGRESS = "in_progress"
+DONE = "done"
+
+
+class CrawlFrontier:
+    """Bir tarama çalışmasının kalıcı iş listesi"""
+
+    def __init__(self, db, run_id, collection_name="crawl_frontier", resumed=False):
+        self.collection = db[collection_name]
+        self.run_id = run_id
+        # Yeni çalışmada henüz biten birim yoktur; is_done/done_keys sorgusu gereksizdir
+        self.resumed = resumed
+
+    @classmethod
+    def open(cls, db, resume=False, collection_name="crawl_frontier", ttl_days=7):
+        """
+        Yeni çalışma başlat veya yarım kalan son çalışmayı aç
+
+        Args:
+            resume: True ise bitmemiş son çalışmaya devam edilir
+            ttl_days: bu süre boyunca güncellenmeyen kayıtlar (terk edilmiş çalışmalar) silinir
+        """
+        collection = db[collection_name]
+        collection.create_index([("run_id", 1), ("kind", 1), ("status", 1)])
+        # Süre değiştiyse collMod ile güncellenir (IndexOptionsConflict taramayı durdurmaz)
+        ensure_ttl_index(collection, "updated_at", ttl_days * 86400)
+
+        if resume:
+            last = collection.find_one(
+                {"kind": "run", "status": {"$ne": DONE}},
+                sort=[("started_at", DESCENDING)]
+            )
+            if last:
+                logger.info(f"Resuming crawl run {last['run_id']}")
+                collection.update_one({"_id": last["_id"]}, {"$set": {"updated_at": datetime.utcnow()}})
+                return cls(db, last["run_id"], collection_name, resumed=True)
+            logger.info("No unfinished crawl run found, starting a new one")
+
+        run_id = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+        frontier = cls(db, run_id, collection_name)
+        collection.insert_one({
+            "_id": frontier._id("run", run_id),
+            "run_id": run_id,
+            "kind": "run",
+            "key": run_id,
+            "status": IN_PROGRESS,
+            "started_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow()
+        })
+        logger.info(f"Started crawl run {run_id}")
+        return frontier
+
+    def _id(self, kind, key):
+        return f"{self.run_id}:{kind}:{key}"
+
+    def _upsert(self, kind, key, status):
+        return UpdateOne(
+            {"_id": self._id(kind, key)},
+            {
+                "$set": {"status": status, "updated_at": datetime.utcnow()},
+                "$setOnInsert": {"run_id": self.run_id, "kind": kind, "key": key}
+            },
+            upsert=True
+        )
+
+    def seed(self, kind, keys):
+        """Birimleri (yoksa) pending olarak ekle"""
+        ops = [
+            UpdateOne(
+                {"_id": self._id(kind, key)},
+                {"$setOnInsert": {
+                    "run_id": self.run_id, "kind": kind, "key": key,
+                    "status": PENDING, "updated_at": datetime.utcnow()
+                }},
+                upsert=True
+            )
+            for key in keys
+        ]
+        if ops:
+            self.collection.bulk_write(ops, ordered=False)
+
+    def mark(self, kind, key, status):
+        """Tek birimin durumunu güncelle"""
+        self.collection.bulk_write([self._upsert(kind, key, status)])
+
+    def complete_many(self, kind, keys):
+        """Birimleri toplu olarak done işaretle"""
+        ops = [self._upsert(kind, key, DONE) for key in keys]
+        if ops:
+            self.collection.bulk_write(ops, ordered=False)
+
+    def is_done(self, kind, key):
+        return self.collection.count_documents({"_id": self._id(kind, key), "status": DONE}, limit=1) > 0
+
+    def done_keys(self, kind, keys):
+        """Verilen birimlerden tamamlanmış olanları tek sorguda getir"""
+        if not keys:
+            return set()
+        cursor = self.collection.find(
+            {"_id": {"$in": [self._id(kind, key) for key in keys]}, "status": DONE},
+            {"key": 1}
+        )
+        return {doc["key"] for doc in cursor}
+
+    def unfinished(self, kind, keys):
+        """Tamamlanmamış birimler (in_progress olanlar önceki çalışmada yarım kalmıştır)"""
+        done = self.done_keys(kind, list(keys))
+        return [key for key in keys if key not in done]
+
+    def finish(self):
+        """Çalışmayı tamamlandı olarak işaretle ve birim dokümanlarını sil (başlık kalır)"""
+        self.collection.update_one(
+            {"_id": self._id("run", self.run_id)},
+            {"$set": {"status": DONE, "finished_at": datetime.utcnow(), "updated_at": datetime.utcnow()}}
+        )
+        result = self.collection.delete_many({"run_id": self.run_id, "kind": {"$ne": "run"}})
+        logger.info(f"Crawl run {self.run_id} finished ({result.deleted_count} checkpoints removed)")
+
+    def progress(self):
+        """Tür ve durum bazında birim sayıları"""
+        pipeline = [
+            {"$match": {"run_id": self.run_id, "kind": {"$ne": "run"}}},
+            {"$group": {"_id": {"kind": "$kind", "status": "$status"}, "count": {"$sum": 1}}}
+        ]
+        return {
+            f"{row['_id']['kind']}:{row['_id']['status']}": row["count"]
+            for row in self.collection.aggregate(pipeline)
+        }
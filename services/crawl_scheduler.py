@@ -0,0 +1,140 @@
+"""
+EkerGallery - Değişim Oranına Göre Kategori Planlayıcı
+Her kategorinin son taramalarda bulduğu yeni/değişen ilan sayısını tutar ve
+bir sonraki taramada hangi kategorinin ne kadar derin (kaç sayfa) taranacağına
+karar verir. Hedef: çalışma başına zaman bütçesi içinde, taranan saat başına
+en çok taze ilanı bulmak.
+
+Geçmiş crawl_state koleksiyonunda (high-water mark ile aynı dokümanda) tutulur:
+    {"_id": "tesla/model-y", "history": [{"at", "new", "changed", "pages", "seconds"}, ...]}
+"""
+
+import logging
+import math
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+LISTINGS_PER_PAGE = 20
+DEFAULT_SECONDS_PER_PAGE = 90  # Geçmiş yokken sayfa (detaylar dahil) başına tahmini süre
+
+
+def record_category_run(db, collection_name, brand_key, model_key, new, changed, pages, seconds, history_size=10):
+    """Kategori tarama sonucunu geçmişe ekle (son history_size kayıt tutulur)"""
+    db[collection_name].update_one(
+        {"_id": f"{brand_key}/{model_key}"},
+        {
+            "$set": {"marka": brand_key, "model": model_key, "last_crawled_at": datetime.utcnow()},
+            "$push": {"history": {
+                "$each": [{
+                    "at": datetime.utcnow(),
+                    "new": new,
+                    "changed": changed,
+                    "pages": pages,
+                    "seconds": round(seconds, 1)
+                }],
+                "$slice": -history_size
+            }}
+        },
+        upsert=True
+    )
+
+
+class ChurnScheduler:
+    """
+    Kategori başına tarama sıklığı ve sayfa derinliği planlayıcısı.
+
+    Tahminler:
+    - fresh_per_hour: geçmişte bulunan (yeni + değişen) ilan / geçen saat
+    - expected_fresh: fresh_per_hour * son taramadan beri geçen saat
+    - pages: beklenen taze ilanları kapsayacak sayfa + 1 (high-water mark'a ulaşmak için)
+    - value: beklenen taze ilan / tahmini tarama süresi
+    """
+
+    def __init__(self, db, collection_name, time_budget_minutes=200, max_pages=10, min_pages=1,
+                 min_expected_fresh=3, max_interval_hours=24, workers=1):
+        self.collection = db[collection_name]
+        self.time_budget = time_budget_minutes * 60 * max(1, workers)
+        self.max_pages = max_pages
+        self.min_pages = min_pages
+        self.min_expected_fresh = min_expected_fresh
+        self.max_interval_hours = max_interval_hours
+
+    def _estimate(self, state, now):
+        history = (state or {}).get("history") or []
+        if not history:
+            # Hiç taranmamış kategori: tam derinlik, en yüksek öncelik
+            return {"due": True, "pages": self.max_pages, "expected_fresh": None,
+                    "seconds": self.max_pages * DEFAULT_SECONDS_PER_PAGE, "value": math.inf,
+                    "reason": "no history"}
+
+        pages = sum(h.get("pages", 0) for h in history)
+        seconds = sum(h.get("seconds", 0) for h in history)
+        seconds_per_page = seconds / pages if pages else DEFAULT_SECONDS_PER_PAGE
+
+        # İlk kayıt kendinden önceki dönemi bilmediği için oran hesabına girmez
+        fresh = sum(h.get("new", 0) + h.get("changed", 0) for h in history[1:])
+        span_hours = (history[-1]["at"] - history[0]["at"]).total_seconds() / 3600
+        if span_hours > 0:
+            fresh_per_hour = fresh / span_hours
+        else:
+            fresh_per_hour = history[-1].get("new", 0) + history[-1].get("changed", 0)
+
+        last_at = state.get("last_crawled_at") or history[-1]["at"]
+        hours_since = max(0.0, (now - last_at).total_seconds() / 3600)
+        expected_fresh = fresh_per_hour * hours_since
+
+        page_count = math.ceil(expected_fresh / LISTINGS_PER_PAGE) + 1
+        page_count = max(self.min_pages, min(self.max_pages, page_count))
+        cost = page_count * seconds_per_page
+
+        overdue = hours_since >= self.max_interval_hours
+        due = overdue or expected_fresh >= self.min_expected_fresh
+        return {
+            "due": due,
+            "pages": page_count,
+            "expected_fresh": round(expected_fresh, 1),
+            "seconds": cost,
+            # Uzun süredir taranmayan kategori, değeri düşük olsa da bütçeye girer
+            "value": math.inf if overdue else expected_fresh / max(cost, 1),
+            "reason": "overdue" if overdue else f"{fresh_per_hour:.2f} fresh/h"
+        }
+
+    def plan(self, categories):
+        """
+        Args:
+            categories: [(brand_key, model_key, model_info), ...]
+
+        Returns:
+            list: [(brand_key, model_key, model_info, max_pages), ...] öncelik sırasıyla
+        """
+        now = datetime.utcnow()
+        states = {doc["_id"]: doc for doc in self.collection.find(
+            {"_id": {"$in": [f"{b}/{m}" for b, m, _ in categories]}}
+        )}
+
+        candidates = []
+        for brand_key, model_key, model_info in categories:
+            estimate = self._estimate(states.get(f"{brand_key}/{model_key}"), now)
+            if not estimate["due"]:
+                logger.info(f"Schedule: skip {brand_key}/{model_key} "
+                            f"(expected {estimate['expected_fresh']} fresh, {estimate['reason']})")
+                continue
+            candidates.append((estimate, brand_key, model_key, model_info))
+
+        candidates.sort(key=lambda c: c[0]["value"], reverse=True)
+
+        planned = []
+        spent = 0.0
+        for estimate, brand_key, model_key, model_info in candidates:
+            if spent + estimate["seconds"] > self.time_budget and planned:
+                logger.info(f"Schedule: {brand_key}/{model_key} deferred (time budget)")
+                continue
+            spent += estimate["seconds"]
+            planned.append((brand_key, model_key, model_info, estimate["pages"]))
+            logger.info(f"Schedule: {brand_key}/{model_key} -> {estimate['pages']} pages "
+                        f"(expected {estimate['expected_fresh']} fresh, {estimate['reason']})")
+
+        logger.info(f"Schedule: {len(planned)}/{len(categories)} categories, "
+                    f"~{spent / 60:.0f} of {self.time_budget / 60:.0f} worker-minutes")
+        return planned
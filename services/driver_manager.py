@@ -0,0 +1,226 @@
+"""
+EkerGallery - Tarayıcı Yaşam Döngüsü
+Saatler süren taramada tek Chrome örneğinin belleği sürekli büyür. ManagedDriver
+sürücüyü N sayfada bir veya Chrome süreç ağacının bellek kullanımı (RSS) eşiği
+aşınca geri dönüştürür; çöken veya takılan sayfa açılışında sürücüyü yeniden
+başlatıp isteği bir kez tekrarlar.
+
+Profil dizini kalıcı olduğundan yeni sürücü çerezleri ve oturumu devralır,
+google.com ısınma ziyareti sadece profil ilk oluşturulurken yapılır.
+"""
+
+import logging
+import os
+import time
+
+from selenium.common.exceptions import TimeoutException, WebDriverException, InvalidSessionIdException
+from urllib3.exceptions import HTTPError as DriverConnectionError
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+
+class DriverInitError(Exception):
+    """Chrome başlatılamadı"""
+
+
+# Chrome/chromedriver'ın öldüğünü gösteren WebDriverException mesajları; diğer hatalar
+# (ör. net::ERR_NAME_NOT_RESOLVED) sıradan gezinme hatasıdır, Chrome yeniden başlatılmaz
+_DEAD_SESSION_MARKERS = (
+    "chrome not reachable", "disconnected", "session deleted", "invalid session id",
+    "no such window", "target window already closed", "tab crashed",
+)
+
+
+def is_dead_session(error):
+    """Hata takılan/ölmüş tarayıcıdan mı (yeniden başlatma gerekir) yoksa sıradan gezinme hatası mı"""
+    if isinstance(error, (TimeoutException, InvalidSessionIdException, DriverConnectionError, ConnectionError)):
+        return True
+    if isinstance(error, WebDriverException):
+        message = (error.msg or str(error)).lower()
+        return any(marker in message for marker in _DEAD_SESSION_MARKERS)
+    return False
+
+
+class ManagedDriver:
+    """
+    WebDriver yerine geçen, geri dönüşüm ve yeniden başlatma yapan sarmalayıcı.
+
+    get() dışındaki tüm çağrılar (page_source, find_element, execute_script...)
+    o anki sürücüye aktarılır.
+
+    Args:
+        factory: factory(profile_dir, warmup) -> WebDriver (hata durumunda DriverInitError)
+        profile_dir: kalıcı Chrome profil dizini (None = geçici profil, her başlatmada ısınma)
+        max_pages: bu kadar sayfa açılınca geri dönüşüm (0 = kapalı)
+        max_rss_mb: Chrome süreç ağacının RSS eşiği (psutil gerekir, 0 = kapalı)
+        max_restarts: art arda bu kadar başarısız yeniden başlatmadan sonra hata yükselt
+        on_event: on_event(name) -> "driver_recycle" / "driver_restart" olaylarını sayar
+    """
+
+    RSS_CHECK_EVERY = 10  # Bellek kontrolü kaç sayfada bir yapılır
+
+    def __init__(self, factory, profile_dir=None, max_pages=200, max_rss_mb=1500,
+                 page_load_timeout=60, max_restarts=3, on_event=None, name="driver"):
+        self.factory = factory
+        self.profile_dir = profile_dir
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb if psutil is not None else 0
+        self.page_load_timeout = page_load_timeout
+        self.max_restarts = max_restarts
+        self.on_event = on_event
+        self.name = name
+        self._driver = None
+        self._pages_since_start = 0
+        self.pages = 0
+        self.recycles = 0
+        self.restarts = 0
+
+    # --- Yaşam döngüsü ---
+
+    def _start(self):
+        profile_ready = bool(self.profile_dir) and os.path.isdir(self.profile_dir) and os.listdir(self.profile_dir)
+        if self.profile_dir:
+            os.makedirs(self.profile_dir, exist_ok=True)
+        driver = self.factory(self.profile_dir, warmup=not profile_ready)
+        if self.page_load_timeout:
+            # Takılan sayfa açılışı TimeoutException ile kesilir ve yeniden başlatmaya gider
+            driver.set_page_load_timeout(self.page_load_timeout)
+        self._driver = driver
+        self._pages_since_start = 0
+        return driver
+
+    def _stop(self):
+        driver, self._driver = self._driver, None
+        if driver is None:
+            return
+        pids = self._process_tree(driver)
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"{self.name}: quit failed ({e}), killing browser processes")
+        # quit() çökmüş tarayıcıda artık süreç bırakabilir
+        for proc in pids:
+            try:
+                if proc.is_running():
+                    proc.kill()
+            except Exception:
+                pass
+
+    @property
+    def driver(self):
+        if self._driver is None:
+            self._start()
+        return self._driver
+
+    def recycle(self, reason):
+        """Sürücüyü planlı olarak kapatıp yenisini aç"""
+        logger.info(f"{self.name}: recycling browser ({reason}) after {self._pages_since_start} pages")
+        self._stop()
+        self._start()
+        self.recycles += 1
+        self._emit("driver_recycle")
+
+    def restart(self, reason):
+        """Çöken/takılan sürücüyü yeniden başlat"""
+        logger.warning(f"{self.name}: restarting browser ({reason})")
+        self._stop()
+        last_error = None
+        for attempt in range(1, self.max_restarts + 1):
+            try:
+                self._start()
+                self.restarts += 1
+                self._emit("driver_restart")
+                return
+            except DriverInitError as e:
+                last_error = e
+                logger.error(f"{self.name}: restart attempt {attempt} failed: {e}")
+                time.sleep(5 * attempt)
+        raise DriverInitError(f"{self.name}: browser could not be restarted: {last_error}")
+
+    def quit(self):
+        self._stop()
+
+    def _emit(self, event):
+        if self.on_event is not None:
+            try:
+                self.on_event(event)
+            except Exception:
+                pass
+
+    # --- Bellek ---
+
+    @staticmethod
+    def _process_tree(driver):
+        if psutil is None:
+            return []
+        pid = getattr(driver, "browser_pid", None)
+        if pid is None:
+            service = getattr(driver, "service", None)
+            process = getattr(service, "process", None)
+            pid = getattr(process, "pid", None)
+        if pid is None:
+            return []
+        try:
+            root = psutil.Process(pid)
+            return [root] + root.children(recursive=True)
+        except psutil.Error:
+            return []
+
+    def rss_mb(self):
+        """Chrome süreç ağacının toplam RSS'i (MB); psutil yoksa None"""
+        if psutil is None or self._driver is None:
+            return None
+        total = 0
+        for proc in self._process_tree(self._driver):
+            try:
+                total += proc.memory_info().rss
+            except psutil.Error:
+                continue
+        return total / (1024 * 1024)
+
+    def _recycle_reason(self):
+        if self.max_pages and self._pages_since_start >= self.max_pages:
+            return f"{self._pages_since_start} pages"
+        if self.max_rss_mb and self._pages_since_start % self.RSS_CHECK_EVERY == 0:
+            rss = self.rss_mb()
+            if rss is not None and rss >= self.max_rss_mb:
+                return f"RSS {rss:.0f} MB"
+        return None
+
+    # --- WebDriver arayüzü ---
+
+    def get(self, url):
+        """
+        Sayfayı aç; gerekiyorsa önce geri dönüştür. Takılma veya ölü oturumda yeniden başlatıp
+        bir kez dener; sıradan gezinme hataları (WebDriverException) çağırana aynen iletilir.
+        """
+        if self._driver is not None and self._pages_since_start:
+            reason = self._recycle_reason()
+            if reason:
+                self.recycle(reason)
+        try:
+            self.driver.get(url)
+        except (WebDriverException, DriverConnectionError, ConnectionError) as e:
+            if not is_dead_session(e):
+                raise
+            kind = "hung navigation" if isinstance(e, TimeoutException) else "browser error"
+            self.restart(f"{kind}: {str(e).splitlines()[0] if str(e) else type(e).__name__}")
+            self._driver.get(url)
+        self._pages_since_start += 1
+        self.pages += 1
+
+    def __getattr__(self, name):
+        # Sadece sınıfta tanımlı olmayan adlar buraya düşer
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.driver, name)
+
+    def summary(self):
+        rss = self.rss_mb()
+        memory = f", browser RSS {rss:.0f} MB" if rss is not None else ""
+        return f"{self.name}: {self.pages} pages, {self.recycles} recycles, {self.restarts} restarts{memory}"
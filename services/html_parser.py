@@ -0,0 +1,209 @@
+"""
+EkerGallery - HTML Ayrıştırıcı
+Sahibinden liste ve detay sayfalarını tek geçişte ayrıştırır.
+
+Fonksiyonlar sadece HTML metni alır (WebDriver'a bağımlı değildir); bu sayede
+kayıtlı sayfalar üzerinde test edilebilir ve ölçülebilir:
+
+    python services/html_parser.py liste.html
+    python services/html_parser.py detay.html --detail -n 100
+"""
+
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+BASE_URL = "https://www.sahibinden.com"
+
+# Liste sayfasında sadece ilan satırları ayrıştırılır
+_LISTING_ROWS = SoupStrainer("tr", attrs={"class": "searchResultsItem"})
+
+
+# Bot kontrolü ve giriş ekranı işaretleri
+BOT_MARKERS = ["Olağandışı", "Olağan dışı", "robot", "captcha"]
+LOGIN_URL_MARKERS = ["UyeGiris", "giris-yap", "secure.sahibinden.com/giris"]
+CONTENT_MARKERS = ["searchResultsItem", "classifiedDetail"]
+
+
+def detect_block(html, url):
+    """
+    Sayfa bot kontrolü veya giriş ekranı mı?
+
+    Returns:
+        str: "bot", "login" veya None (engel yok / içerik gelmiş)
+    """
+    is_bot = any(x in html for x in BOT_MARKERS)
+    is_login = any(x in url for x in LOGIN_URL_MARKERS)
+    if not is_bot and not is_login:
+        return None
+    # İçerik geldiyse engel yok (ilan metninde "robot" geçebilir)
+    if any(x in html for x in CONTENT_MARKERS):
+        return None
+    return "bot" if is_bot else "login"
+
+
+def parse_price(text):
+    """Fiyat parse et"""
+    if not text:
+        return 0
+    try:
+        clean = text.replace('TL', '').replace('.', '').replace(',', '').strip()
+        return int(clean)
+    except:
+        return 0
+
+
+def parse_km(text):
+    """KM parse et"""
+    if not text:
+        return 0
+    try:
+        clean = text.replace('km', '').replace('.', '').replace(',', '').strip()
+        return int(clean)
+    except:
+        return 0
+
+
+def _text(elem):
+    return elem.get_text(" ", strip=True) if elem is not None else ""
+
+
+def parse_listing_page(html, base_url=BASE_URL):
+    """
+    Liste sayfası HTML'inden ilanları çıkar
+
+    Returns:
+        list: [{"ilan_no", "baslik", "url", "fiyat", "model_detay", "yil", "km", "renk", "raw_location"}, ...]
+    """
+    listings = []
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=_LISTING_ROWS)
+
+    for item in soup.find_all("tr", class_="searchResultsItem"):
+        try:
+            data_id = item.get("data-id")
+            if not data_id:
+                continue
+
+            # Başlık ve link
+            title_elem = item.select_one(".classifiedTitle")
+            if title_elem is None:
+                continue
+            title = _text(title_elem)
+            link = urljoin(base_url, title_elem.get("href", ""))
+
+            # Fiyat
+            price = parse_price(_text(item.select_one(".searchResultsPriceValue")))
+
+            # Tablo hücreleri
+            cells = item.find_all("td")
+
+            model_name = _text(cells[1]) if len(cells) > 1 else ""
+            year = 0
+            if len(cells) > 3:
+                try:
+                    year = int(_text(cells[3]))
+                except ValueError:
+                    pass
+
+            km = parse_km(_text(cells[4])) if len(cells) > 4 else 0
+            color = _text(cells[5]) if len(cells) > 5 else ""
+            location = _text(cells[8]) if len(cells) > 8 else ""
+
+            listings.append({
+                "ilan_no": data_id,
+                "baslik": title,
+                "url": link,
+                "fiyat": price,
+                "model_detay": model_name,
+                "yil": year,
+                "km": km,
+                "renk": color,
+                "raw_location": location
+            })
+        except Exception:
+            continue
+
+    return listings
+
+
+def parse_detail_page(html):
+    """
+    Detay sayfası HTML'inden ek bilgi çıkar:
+    - Yakıt tipi
+    - Vites
+    - Boyalı parçalar
+    - Değişen parçalar
+    - Hasar puanı
+    """
+    result = {
+        "yakit": "",
+        "vites": "",
+        "boyali_parcalar": [],
+        "degisen_parcalar": [],
+        "hasar_puani": 0
+    }
+    soup = BeautifulSoup(html, HTML_PARSER)
+
+    # Bilgi tablosu
+    for row in soup.select(".classifiedInfoList li"):
+        label = _text(row.find("strong"))
+        if not label:
+            continue
+        value = _text(row).replace(label, "", 1).strip()
+
+        if "Yakıt" in label:
+            result["yakit"] = value
+        elif "Vites" in label:
+            result["vites"] = value
+
+    # Tramer / Expertise bilgisi (Boya-Değişen bölümü)
+    for item in soup.select(".classified-expertise-list li, .damage-history li"):
+        text = _text(item)
+        lower = text.lower()
+        if "boyalı" in lower or "boyali" in lower:
+            result["boyali_parcalar"].append(text)
+        elif "değişen" in lower or "degisen" in lower:
+            result["degisen_parcalar"].append(text)
+
+    # Tramer kaydı kontrol
+    page_text = html.lower()
+    if "tramer kaydı bulunmamaktadır" in page_text or "hasar kaydı yok" in page_text:
+        result["hasar_puani"] = 0
+    elif "tramer" in page_text or "hasar kaydı" in page_text:
+        # Basit skor: boyalı = 5, değişen = 15
+        result["hasar_puani"] = len(result["boyali_parcalar"]) * 5 + len(result["degisen_parcalar"]) * 15
+
+    return result
+
+
+# ========================================
+# BENCHMARK
+# ========================================
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(description='Kayıtlı sayfa üzerinde ayrıştırma ölçümü')
+    parser.add_argument('path', help='Kaydedilmiş HTML dosyası')
+    parser.add_argument('--detail', action='store_true', help='Detay sayfası olarak ayrıştır')
+    parser.add_argument('-n', type=int, default=20, help='Tekrar sayısı')
+    args = parser.parse_args()
+
+    with open(args.path, encoding='utf-8', errors='ignore') as f:
+        html = f.read()
+
+    parse = parse_detail_page if args.detail else parse_listing_page
+    start = time.perf_counter()
+    for _ in range(args.n):
+        parsed = parse(html)
+    elapsed = (time.perf_counter() - start) / args.n
+
+    print(json.dumps(parsed, ensure_ascii=False, indent=2))
+    print(f"Parser: {HTML_PARSER}, {elapsed * 1000:.1f} ms/page ({args.n} runs)")
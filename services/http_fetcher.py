@@ -0,0 +1,165 @@
+"""
+EkerGallery - HTTP Detay Çekici
+Detay sayfalarını Chrome yerine, canlı tarayıcı oturumunun çerez ve
+User-Agent bilgisini taşıyan kalıcı bir requests.Session ile çeker.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    import config as _config
+except ImportError:
+    _config = None
+
+# Ayarlar tek tek okunur: eksik bir ayar diğerini varsayılana düşürmez
+HTTP_POOL_SIZE = getattr(_config, "HTTP_POOL_SIZE", 4)
+HTTP_TIMEOUT_SECONDS = getattr(_config, "HTTP_TIMEOUT_SECONDS", 20)
+
+from services.html_parser import detect_block
+
+logger = logging.getLogger(__name__)
+
+
+class HttpDetailFetcher:
+    """
+    Tarayıcı çerezleriyle beslenen, bağlantı havuzlu HTTP oturumu.
+
+    fetch() engel (bot/giriş) veya hata durumunda None döndürür; çağıran taraf
+    bu durumda sayfayı tarayıcıyla açar ve ardından sync_from_driver() çağırır.
+    """
+
+    def __init__(self, rate_limiter=None, pool_size=HTTP_POOL_SIZE, timeout=HTTP_TIMEOUT_SECONDS):
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.session = requests.Session()
+        retry = Retry(total=2, backoff_factor=1, status_forcelist=[500, 502, 503, 504],
+                      allowed_methods=["GET"])
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "tr-TR,tr;q=0.9,en-US;q=0.8,en;q=0.7",
+            "Connection": "keep-alive",
+        })
+        self._lock = threading.Lock()
+        self.fetched = 0
+        self.blocked = 0
+        self.failed = 0
+
+    def sync_from_driver(self, driver):
+        """Tarayıcının User-Agent ve çerezlerini oturuma kopyala"""
+        try:
+            user_agent = driver.execute_script("return navigator.userAgent")
+            cookies = driver.get_cookies()
+        except Exception as e:
+            logger.warning(f"Could not read browser session: {e}")
+            return
+        with self._lock:
+            if user_agent:
+                self.session.headers["User-Agent"] = user_agent
+            for cookie in cookies:
+                self.session.cookies.set(
+                    cookie["name"], cookie["value"],
+                    domain=cookie.get("domain"), path=cookie.get("path", "/")
+                )
+        logger.info(f"HTTP session synced ({len(cookies)} cookies)")
+
+    def fetch(self, url):
+        """
+        Sayfayı düz HTTP ile çek
+
+        Returns:
+            str: HTML veya None (engel/hata -> tarayıcıya düş)
+        """
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(url)
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            self._count("failed")
+            logger.warning(f"HTTP fetch failed for {url}: {e}")
+            return None
+
+        if response.status_code in (403, 429):
+            # Sunucu tarafı yavaşlatma: engel gibi değerlendirilir
+            self._count("blocked")
+            if self.rate_limiter is not None:
+                self.rate_limiter.record_block(url)
+            logger.warning(f"HTTP {response.status_code} for {url}, backing off")
+            return None
+
+        if response.status_code != 200:
+            self._count("failed")
+            logger.warning(f"HTTP {response.status_code} for {url}, falling back to browser")
+            return None
+
+        html = response.text
+        block = detect_block(html, response.url)
+        if block is not None:
+            self._count("blocked")
+            if self.rate_limiter is not None:
+                self.rate_limiter.record_block(url)
+            logger.warning(f"HTTP fetch hit {block} page for {url}, falling back to browser")
+            return None
+
+        self._count("fetched")
+        if self.rate_limiter is not None:
+            self.rate_limiter.record_success(url)
+        return html
+
+    def _count(self, name):
+        # fetch() eşzamanlı çağrılabilir
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def summary(self):
+        return f"HTTP detail: {self.fetched} fetched, {self.blocked} blocked, {self.failed} failed"
+
+    def close(self):
+        self.session.close()
+
+
+async def _fetch_all(fetcher, urls, concurrency):
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="detail") as executor:
+        async def fetch_one(url):
+            async with semaphore:
+                # requests bloklayıcı olduğundan istek executor'da çalışır;
+                # hız sınırlayıcı fetch() içinde her istekten önce beklenir
+                return url, await loop.run_in_executor(executor, fetcher.fetch, url)
+
+        results = await asyncio.gather(*(fetch_one(url) for url in urls), return_exceptions=True)
+
+    pages = {}
+    for item in results:
+        if isinstance(item, BaseException):
+            logger.warning(f"Concurrent detail fetch error: {item}")
+            continue
+        url, html = item
+        pages[url] = html
+    return pages
+
+
+def fetch_details_concurrently(fetcher, urls, concurrency=4):
+    """
+    Detay sayfalarını asyncio ile sınırlı eşzamanlılıkta çek
+
+    Returns:
+        dict: {url: html veya None (engel/hata -> tarayıcıya düşülmeli)}
+    """
+    if not urls:
+        return {}
+    return asyncio.run(_fetch_all(fetcher, list(urls), max(1, concurrency)))
@@ -0,0 +1,154 @@
+"""
+EkerGallery - Sayfa Arşivi (Kayıt ve Tekrar Oynatma)
+Scraper'ın çektiği liste ve detay sayfalarını sıkıştırılmış, içerik adresli
+(sha256) bir disk arşivine yazar; arşivden canlı siteye gitmeden tüm
+ayrıştırma/yazma hattı tekrar çalıştırılabilir.
+
+Dizin yapısı:
+    <root>/index.jsonl                 # {"url", "kind", "sha256", "size", "fetched_at"} satırları
+    <root>/objects/ab/abcdef....html.gz
+
+Kullanım:
+    python services/scraper_v2.py --capture archive/2026-10-18
+    python services/scraper_v2.py --replay archive/2026-10-18 --mongo-uri mongodb://localhost:27017/
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+
+from bs4 import BeautifulSoup
+from selenium.common.exceptions import NoSuchElementException
+
+from services.html_parser import HTML_PARSER
+
+logger = logging.getLogger(__name__)
+
+
+class PageArchive:
+    """İçerik adresli, gzip sıkıştırmalı sayfa arşivi"""
+
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.index_path = os.path.join(root, "index.jsonl")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._index = None
+        self.stored = 0
+        self.deduplicated = 0
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], f"{digest}.html.gz")
+
+    def store(self, url, kind, html):
+        """Sayfayı arşive yaz; aynı içerik bir kez saklanır"""
+        data = html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+
+        with self._lock:
+            if os.path.exists(path):
+                self.deduplicated += 1
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.tmp"
+                with gzip.open(tmp_path, "wb", compresslevel=6) as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+                self.stored += 1
+
+            entry = {
+                "url": url,
+                "kind": kind,
+                "sha256": digest,
+                "size": len(data),
+                "fetched_at": datetime.utcnow().isoformat()
+            }
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            if self._index is not None:
+                self._index[url] = entry
+        return digest
+
+    def index(self):
+        """url -> son kayıt (aynı URL birden çok kez çekildiyse en yenisi)"""
+        with self._lock:
+            if self._index is None:
+                self._index = {}
+                if os.path.exists(self.index_path):
+                    with open(self.index_path, encoding="utf-8") as f:
+                        for line in f:
+                            line = line.strip()
+                            if line:
+                                entry = json.loads(line)
+                                self._index[entry["url"]] = entry
+            return self._index
+
+    def read(self, url):
+        """URL'nin arşivlenmiş HTML'i (yoksa None)"""
+        entry = self.index().get(url)
+        if entry is None:
+            return None
+        with gzip.open(self._object_path(entry["sha256"]), "rb") as f:
+            return f.read().decode("utf-8")
+
+    def summary(self):
+        return f"Archive {self.root}: {self.stored} pages stored, {self.deduplicated} duplicates"
+
+
+class ReplayDriver:
+    """
+    Arşivden sayfa sunan, scraper'ın kullandığı kadarıyla WebDriver yerine geçen sınıf.
+    Eksik sayfalar boş döner (liste sayfası boşsa kategori orada biter).
+    """
+
+    def __init__(self, archive):
+        self.archive = archive
+        self.current_url = "about:blank"
+        self.page_source = ""
+        self._soup = None
+        self.pages_served = 0
+        self.pages_missing = 0
+
+    def get(self, url):
+        self.current_url = url
+        self._soup = None
+        html = self.archive.read(url)
+        if html is None:
+            self.pages_missing += 1
+            logger.warning(f"Replay: page not in archive: {url}")
+            html = ""
+        else:
+            self.pages_served += 1
+        self.page_source = html
+
+    def _select(self, selector):
+        if self._soup is None:
+            self._soup = BeautifulSoup(self.page_source, HTML_PARSER)
+        return self._soup.select(selector)
+
+    def find_elements(self, by, value):
+        return self._select(value)
+
+    def find_element(self, by, value):
+        found = self._select(value)
+        if not found:
+            raise NoSuchElementException(value)
+        return found[0]
+
+    def execute_script(self, *args, **kwargs):
+        return 0
+
+    def execute_cdp_cmd(self, *args, **kwargs):
+        return {}
+
+    def get_cookies(self):
+        return []
+
+    def quit(self):
+        logger.info(f"Replay driver: {self.pages_served} pages served, {self.pages_missing} missing")
@@ -0,0 +1,66 @@
+"""
+EkerGallery - Boru Hattı (Pipeline) Aşamaları
+Birbirine sınırlı kuyruklarla bağlı iş parçacığı aşamaları. Kuyruk dolunca
+üretici bekler (backpressure); böylece tarayıcı sayfa açarken ayrıştırma ve
+MongoDB yazımı arka planda ilerler, bellek de sınırlı kalır.
+
+    browser (liste + detay) -> [normalize] -> [db writer]
+"""
+
+import logging
+import threading
+from queue import Queue
+
+logger = logging.getLogger(__name__)
+
+# Aşamayı kapatan işaret; sonraki aşamaya da iletilir
+STOP = object()
+
+
+class PipelineStage(threading.Thread):
+    """
+    inbox'tan öğe alıp handler(item) çağıran aşama.
+
+    handler'ın döndürdüğü öğeler (iterable) outbox'a konur. Bir öğedeki hata
+    aşamayı durdurmaz; loglanır ve errors sayacı artar. STOP gelince on_close
+    çağrılır ve STOP sonraki aşamaya iletilir.
+    """
+
+    def __init__(self, name, handler, inbox, outbox=None, on_start=None, on_close=None):
+        super().__init__(name=name, daemon=True)
+        self.handler = handler
+        self.inbox = inbox
+        self.outbox = outbox
+        self.on_start = on_start
+        self.on_close = on_close
+        self.processed = 0
+        self.errors = 0
+
+    def run(self):
+        if self.on_start is not None:
+            self.on_start()
+        while True:
+            item = self.inbox.get()
+            if item is STOP:
+                break
+            try:
+                for result in self.handler(item) or ():
+                    if self.outbox is not None:
+                        self.outbox.put(result)
+                self.processed += 1
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"{self.name}: {e}")
+        try:
+            if self.on_close is not None:
+                self.on_close()
+        except Exception as e:
+            logger.error(f"{self.name} close: {e}")
+        finally:
+            if self.outbox is not None:
+                self.outbox.put(STOP)
+
+
+def bounded_queue(size):
+    """Aşamalar arası kuyruk (size dolunca put() bekler)"""
+    return Queue(maxsize=max(1, size))
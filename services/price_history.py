@@ -0,0 +1,64 @@
+"""
+EkerGallery - Fiyat Geçmişi
+tum_araclar'daki fiyat/km her taramada üzerine yazılır; düşüşler ve
+değişimler burada, ilan başına aylık kovalarda (bucket) sadece gerçekten
+değiştiğinde eklenen kompakt noktalar olarak saklanır.
+
+Doküman yapısı (price_history koleksiyonu):
+    {"_id": "<ilan_no>:<YYYY-MM>", "ilan_no", "month",
+     "points": [[ts, fiyat, km], ...], "first_at", "last_at"}
+
+Değişen ilanlarda tum_araclar dokümanına changed_at (ve fiyat değiştiyse
+onceki_fiyat) yazılır; "şu tarihten beri değişenler" sorgusu bu alandan yapılır.
+
+Ekleme idempotenttir: kovanın son noktası zaten aynı (fiyat, km) ise yeni nokta
+eklenmez; aynı değişiklik iki kez işlenirse (kuyrukta tekrar denenen birim,
+yeniden oynatma) çift nokta oluşmaz.
+
+İndeks (ilan_no, month) models/database.py Database._ensure_indexes içinde kurulur.
+"""
+
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+
+def listing_changed(previous, listing):
+    """Liste verisi son bilinen duruma göre değişti mi? (yeni ilan da değişiklik sayılır)"""
+    if previous is None:
+        return True
+    return previous.get("fiyat") != listing.get("fiyat") or previous.get("km") != listing.get("km")
+
+
+def history_operation(ilan_no, fiyat, km, at=None):
+    """İlanın o ayki kovasına (yoksa oluşturarak) yeni nokta ekleyen işlem (pipeline update)"""
+    at = at or datetime.utcnow()
+    month = at.strftime("%Y-%m")
+    points = {"$ifNull": ["$points", []]}
+    last_values = {"$slice": [{"$arrayElemAt": [points, -1]}, 1, 2]}
+    duplicate = {"$and": [{"$gt": [{"$size": points}, 0]}, {"$eq": [last_values, {"$literal": [fiyat, km]}]}]}
+    return UpdateOne(
+        {"_id": f"{ilan_no}:{month}"},
+        [{"$set": {
+            "ilan_no": ilan_no,
+            "month": month,
+            "first_at": {"$ifNull": ["$first_at", at]},
+            "last_at": {"$cond": [duplicate, "$last_at", at]},
+            "points": {"$cond": [duplicate, points, {"$concatArrays": [points, {"$literal": [[at, fiyat, km]]}]}]},
+        }}],
+        upsert=True
+    )
+
+
+def apply_change(vehicle_doc, previous, at=None):
+    """
+    Doküman son bilinen duruma göre değiştiyse changed_at/onceki_fiyat alanlarını
+    ekle ve geçmiş işlemini döndür; değişmediyse None
+    """
+    if not listing_changed(previous, vehicle_doc):
+        return None
+    at = at or datetime.utcnow()
+    vehicle_doc["changed_at"] = at
+    if previous is not None and previous.get("fiyat") != vehicle_doc.get("fiyat"):
+        vehicle_doc["onceki_fiyat"] = previous.get("fiyat")
+    return history_operation(vehicle_doc["ilan_no"], vehicle_doc.get("fiyat"), vehicle_doc.get("km"), at)
@@ -0,0 +1,130 @@
+"""
+EkerGallery - Uyarlanabilir Hız Sınırlayıcı
+Scraper'ın tüm sayfa isteklerinin hızını tek merkezden belirler.
+
+Host başına token bucket (kova boyutu 1) + jitter: sayfalar sorunsuz geldikçe
+hız kademeli artar, bot/giriş sayfası algılanınca hız yarıya iner ve üstel
+artan bir bekleme (cooldown) uygulanır.
+"""
+
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class _HostState:
+    def __init__(self, rate):
+        self.rate = rate  # saniye başına token
+        self.next_at = 0.0  # bir sonraki token'ın hazır olacağı an
+        self.cooldown_until = 0.0
+        self.ok_streak = 0
+        self.block_streak = 0
+        self.blocks = 0
+        self.requests = 0
+
+
+class AdaptiveRateLimiter:
+    """
+    Tüm worker'ların paylaştığı uyarlanabilir istek zamanlayıcısı.
+
+    Her sayfa isteğinden önce acquire(url), sonucuna göre record_success(url)
+    veya record_block(url) çağrılır.
+    """
+
+    def __init__(self, start_rpm=20, min_rpm=4, max_rpm=40, jitter=0.3,
+                 speedup=1.1, success_window=10, backoff=0.5, block_cooldown=60, max_cooldown=900):
+        self.start_rate = start_rpm / 60.0
+        self.min_rate = min_rpm / 60.0
+        self.max_rate = max_rpm / 60.0
+        self.jitter = jitter
+        self.speedup = speedup
+        self.success_window = success_window
+        self.backoff = backoff
+        self.block_cooldown = block_cooldown
+        self.max_cooldown = max_cooldown
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _host(url):
+        return urlparse(url).netloc or url
+
+    def _state(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self.start_rate)
+        return state
+
+    def _reserve(self, host):
+        """Sıradaki token'ı ayır; beklenmesi gereken süreyi döndür (0 = hemen devam)"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._state(host)
+            state.requests += 1
+            # Bekleyen worker'lar sıraya girer; engel sonrası bekleme bitmeden token yok
+            slot = max(now, state.next_at, state.cooldown_until)
+            interval = 1.0 / state.rate
+            state.next_at = slot + interval
+        # Sabit aralıklı istekler bot gibi görünür
+        return slot - now + random.uniform(0, self.jitter * interval)
+
+    def acquire(self, url):
+        """URL'nin host'u için bir istek hakkı al (gerekirse bekle)"""
+        wait = self._reserve(self._host(url))
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def record_success(self, url):
+        """Sayfa sorunsuz geldi: yeterince art arda başarıda hız artar"""
+        with self._lock:
+            state = self._state(self._host(url))
+            state.block_streak = 0
+            state.ok_streak += 1
+            if state.ok_streak >= self.success_window:
+                state.ok_streak = 0
+                state.rate = min(self.max_rate, state.rate * self.speedup)
+
+    def record_block(self, url):
+        """Bot/giriş sayfası: hız düşer, üstel artan bekleme başlar"""
+        with self._lock:
+            state = self._state(self._host(url))
+            state.blocks += 1
+            state.block_streak += 1
+            state.ok_streak = 0
+            state.rate = max(self.min_rate, state.rate * self.backoff)
+            cooldown = min(self.max_cooldown, self.block_cooldown * 2 ** (state.block_streak - 1))
+            state.cooldown_until = max(state.cooldown_until, time.monotonic() + cooldown)
+            return cooldown
+
+    def current_rate(self, url=None):
+        """Dakikalık güncel hız (url verilmezse host'ların en düşüğü)"""
+        with self._lock:
+            if url is not None:
+                return self._state(self._host(url)).rate * 60
+            if not self._hosts:
+                return self.start_rate * 60
+            return min(state.rate for state in self._hosts.values()) * 60
+
+    @property
+    def blocks_hit(self):
+        with self._lock:
+            return sum(state.blocks for state in self._hosts.values())
+
+    def snapshot(self):
+        """Host bazında hız ve engel sayıları"""
+        with self._lock:
+            return {
+                host: {
+                    "rate_per_minute": round(state.rate * 60, 2),
+                    "requests": state.requests,
+                    "blocks": state.blocks,
+                    "cooling_down": state.cooldown_until > time.monotonic()
+                }
+                for host, state in self._hosts.items()
+            }
+
+    def summary(self):
+        hosts = ", ".join(f"{host}: {info['rate_per_minute']}/min" for host, info in self.snapshot().items())
+        return f"Rate limiter: {self.current_rate():.1f} req/min, {self.blocks_hit} blocks hit ({hosts})"
@@ -0,0 +1,215 @@
+"""
+EkerGallery - Scraper Faz Ölçümleri
+Tarama süresinin nereye gittiğini faz bazında ölçer (sayfa açma, bekleme,
+manuel müdahale, ayrıştırma, detay çekme, DB yazma, uyku) ve kategori ile
+çalışma bazında toplar.
+
+Çıktılar:
+    logs/scrape_report.json   # Admin paneli /api/scrape-report
+    logs/scrape_metrics.prom  # Prometheus node_exporter textfile collector
+
+Fazlar iç içe açılabilir; her faz kendi süresini (alt fazlar hariç, "seconds")
+ve toplam süresini (alt fazlar dahil, "inclusive_seconds") ayrı tutar.
+Böylece fazların "seconds" toplamı ölçülen süreyi iki kez saymaz; kategori
+süresinin ölçülmeyen kısmı "unmeasured_seconds" olarak raporlanır.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+PHASES = ("navigate", "wait", "manual", "parse", "detail", "db_read", "db_write", "sleep")
+
+
+def _empty_phases():
+    return {name: {"seconds": 0.0, "inclusive_seconds": 0.0, "calls": 0} for name in PHASES}
+
+
+class ScrapeMetrics:
+    """Worker thread'lerinin ortak kullandığı faz süre toplayıcısı"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.started_at = datetime.utcnow()
+        self._started = time.time()
+        self.run = _empty_phases()
+        self.categories = {}
+        self.counters = {}
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def category(self, key):
+        """Bu thread'deki ölçümleri kategoriye bağla; kategori duvar saati de tutulur"""
+        self._local.category = key
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                entry = self._category_entry(key)
+                entry["wall_seconds"] += elapsed
+                entry["runs"] += 1
+            self._local.category = None
+
+    def attach(self, key):
+        """Bu thread'in ölçümlerini kategoriye bağla (duvar saati tutmadan; pipeline aşamaları için)"""
+        self._local.category = key
+
+    def _category_entry(self, key):
+        entry = self.categories.get(key)
+        if entry is None:
+            entry = self.categories[key] = {"wall_seconds": 0.0, "runs": 0, "phases": _empty_phases()}
+        return entry
+
+    @contextmanager
+    def phase(self, name):
+        """Bloğun süresini faza yaz"""
+        stack = self._stack()
+        frame = [0.0]  # alt fazlarda geçen süre
+        stack.append(frame)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            stack.pop()
+            if stack:
+                stack[-1][0] += elapsed
+            self._record(name, elapsed - frame[0], elapsed)
+
+    def add(self, name, seconds):
+        """Faza doğrudan süre ekle (ör. ölçümü başka yerde yapılmış bekleme)"""
+        stack = self._stack()
+        if stack:
+            # Açık faz varsa bu süre onun kendi süresinden düşülür
+            stack[-1][0] += seconds
+        self._record(name, seconds, seconds)
+
+    def count(self, name, n=1):
+        """Olay sayacını artır (ör. driver_recycle, driver_restart)"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def _record(self, name, seconds, inclusive):
+        key = getattr(self._local, "category", None)
+        with self._lock:
+            targets = [self.run]
+            if key is not None:
+                targets.append(self._category_entry(key)["phases"])
+            for phases in targets:
+                phase = phases.setdefault(name, {"seconds": 0.0, "inclusive_seconds": 0.0, "calls": 0})
+                phase["seconds"] += seconds
+                phase["inclusive_seconds"] += inclusive
+                phase["calls"] += 1
+
+    def report(self, extra=None):
+        """JSON'a yazılabilir çalışma raporu"""
+        with self._lock:
+            run = {name: dict(values) for name, values in self.run.items()}
+            counters = dict(self.counters)
+            categories = {
+                key: {
+                    "wall_seconds": round(entry["wall_seconds"], 2),
+                    "unmeasured_seconds": round(
+                        entry["wall_seconds"] - sum(v["seconds"] for v in entry["phases"].values()), 2),
+                    "runs": entry["runs"],
+                    "phases": {name: _rounded(values) for name, values in entry["phases"].items()}
+                }
+                for key, entry in self.categories.items()
+            }
+        measured = sum(values["seconds"] for values in run.values())
+        report = {
+            "started_at": self.started_at.isoformat(),
+            "updated_at": datetime.utcnow().isoformat(),
+            "elapsed_seconds": round(time.time() - self._started, 2),
+            "measured_seconds": round(measured, 2),
+            "phases": {name: _rounded(values) for name, values in run.items()},
+            "phase_share": {
+                name: round(values["seconds"] / measured, 4) if measured else 0.0
+                for name, values in run.items()
+            },
+            "categories": categories,
+            "events": counters,
+        }
+        if extra:
+            report.update(extra)
+        return report
+
+    def prometheus(self, report):
+        """Prometheus metin formatı"""
+        lines = [
+            "# HELP scraper_phase_seconds_total Scraper time per phase (exclusive of nested phases)",
+            "# TYPE scraper_phase_seconds_total counter",
+        ]
+        for name, values in report["phases"].items():
+            lines.append(f'scraper_phase_seconds_total{{phase="{name}"}} {values["seconds"]}')
+        lines += [
+            "# HELP scraper_phase_calls_total Number of measured blocks per phase",
+            "# TYPE scraper_phase_calls_total counter",
+        ]
+        for name, values in report["phases"].items():
+            lines.append(f'scraper_phase_calls_total{{phase="{name}"}} {values["calls"]}')
+        lines += [
+            "# HELP scraper_category_phase_seconds_total Scraper time per category and phase",
+            "# TYPE scraper_category_phase_seconds_total counter",
+        ]
+        for key, entry in report["categories"].items():
+            for name, values in entry["phases"].items():
+                if values["calls"]:
+                    lines.append(f'scraper_category_phase_seconds_total{{category="{key}",phase="{name}"}} '
+                                 f'{values["seconds"]}')
+        lines += [
+            "# HELP scraper_category_wall_seconds_total Wall time per category",
+            "# TYPE scraper_category_wall_seconds_total counter",
+        ]
+        for key, entry in report["categories"].items():
+            lines.append(f'scraper_category_wall_seconds_total{{category="{key}"}} {entry["wall_seconds"]}')
+        lines += [
+            "# HELP scraper_events_total Scraper lifecycle events (browser recycles, restarts)",
+            "# TYPE scraper_events_total counter",
+        ]
+        for name, value in report["events"].items():
+            lines.append(f'scraper_events_total{{event="{name}"}} {value}')
+        lines += [
+            "# HELP scraper_run_elapsed_seconds Wall time of the current run",
+            "# TYPE scraper_run_elapsed_seconds gauge",
+            f'scraper_run_elapsed_seconds {report["elapsed_seconds"]}',
+        ]
+        # Sayısal ek alanlar (araç, sayfa, engel sayıları) gauge olarak yazılır
+        for name, value in (report.get("totals") or {}).items():
+            lines.append(f"# TYPE scraper_{name} gauge")
+            lines.append(f"scraper_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, json_path, prom_path=None, extra=None):
+        """Raporu JSON (ve istenirse Prometheus) dosyasına atomik olarak yaz"""
+        report = self.report(extra)
+        _atomic_write(json_path, json.dumps(report, ensure_ascii=False, indent=2))
+        if prom_path:
+            _atomic_write(prom_path, self.prometheus(report))
+        return report
+
+
+def _rounded(values):
+    return {
+        "seconds": round(values["seconds"], 2),
+        "inclusive_seconds": round(values["inclusive_seconds"], 2),
+        "calls": values["calls"]
+    }
+
+
+def _atomic_write(path, content):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
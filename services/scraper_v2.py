@@ -5,6 +5,24 @@ Features:
 - Detail page scraping for damage info
 - AI price prediction integration
 - Robust error handling
+- Parallel worker pool (--workers N) with a shared per-host request budget
+- Incremental crawl with per-category high-water marks (--full to disable)
+- Detail cache: unchanged listings skip the detail page revisit
+- Batched unordered bulk upserts
+- Single-pass HTML parsing of page_source (services/html_parser.py)
+- Optional HTTP fast path for detail pages (--detail-mode http)
+- Asyncio detail stage with bounded concurrency (--detail-concurrency)
+- Heavy resource blocking via Chrome DevTools Protocol (--block-profile)
+- Checkpointed crawl frontier, interrupted runs continue with --resume
+- Record (--capture DIR) and offline replay (--replay DIR) of fetched pages
+- Adaptive rate limiter (token bucket + jitter, backs off on bot/login pages)
+- Churn-aware scheduling: per-category frequency and depth within a time budget (--schedule churn)
+- Per-phase timing, JSON run report and Prometheus text export (services/scrape_metrics.py)
+- Managed browser lifecycle: recycling by page count/RSS, restart on crash or hung navigation
+- Distributed mode: lease-based Mongo work queue of listing pages and detail URLs (--queue seed|work)
+- Pipelined stages: browser -> normalize -> DB writer over bounded queues (--pipeline)
+- Compact monthly price history, written only on real price/km changes (changed_at signal)
+- Materialized dashboard stats refreshed per scraped category (models/stats.py)
 """
 
 import argparse
@@ -13,19 +31,29 @@ import random
 import os
 import sys
 import logging
-from datetime import datetime
+import signal
+import threading
+from queue import Queue, Empty
+from datetime import datetime, timedelta
 import undetected_chromedriver as uc
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from pymongo import MongoClient
+from pymongo import UpdateOne
 import requests
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 try:
-    from config import MONGO_URI, DB_NAME, COLLECTION_NAME, VEHICLE_CATEGORIES, MAX_PAGES_PER_CATEGORY, SKIP_MODELS
+    import config as _config
 except ImportError:
+    _config = None
+
+# Temel ayarlar: config.py varsa eksiksiz olmalı (eksik ad ImportError ile durdurur; sessizce
+# localhost'a ve boş kategori listesine düşülmez). config.py hiç yoksa eski varsayılanlar.
+if _config is not None:
+    from config import MONGO_URI, DB_NAME, COLLECTION_NAME, VEHICLE_CATEGORIES, MAX_PAGES_PER_CATEGORY, SKIP_MODELS
+else:
     MONGO_URI = "mongodb://localhost:27017/"
     DB_NAME = "sahibinden_data"
     COLLECTION_NAME = "tum_araclar"
@@ -33,33 +61,167 @@ except ImportError:
     MAX_PAGES_PER_CATEGORY = 10
     SKIP_MODELS = []
 
+# Scraper ayarları tek tek okunur: config.py'de olmayan bir ayar sadece kendi varsayılanına
+# düşer (başlangıçta uyarı loglanır), diğer ayarları etkilemez
+_missing_settings = []
+
+
+def _setting(name, default):
+    if _config is not None and hasattr(_config, name):
+        return getattr(_config, name)
+    if _config is not None:
+        _missing_settings.append(name)
+    return default
+
+
+SCRAPER_WORKERS = _setting("SCRAPER_WORKERS", 1)
+RATE_LIMIT_START_RPM = _setting("RATE_LIMIT_START_RPM", 20)
+RATE_LIMIT_MIN_RPM = _setting("RATE_LIMIT_MIN_RPM", 4)
+RATE_LIMIT_MAX_RPM = _setting("RATE_LIMIT_MAX_RPM", 40)
+RATE_LIMIT_JITTER = _setting("RATE_LIMIT_JITTER", 0.3)
+RATE_LIMIT_BLOCK_COOLDOWN_SECONDS = _setting("RATE_LIMIT_BLOCK_COOLDOWN_SECONDS", 60)
+INCREMENTAL_CRAWL = _setting("INCREMENTAL_CRAWL", True)
+INCREMENTAL_KNOWN_STREAK = _setting("INCREMENTAL_KNOWN_STREAK", 3)
+CRAWL_STATE_COLLECTION = _setting("CRAWL_STATE_COLLECTION", "crawl_state")
+INCREMENTAL_FULL_SWEEP_HOURS = _setting("INCREMENTAL_FULL_SWEEP_HOURS", 24)
+DETAIL_CACHE_TTL_HOURS = _setting("DETAIL_CACHE_TTL_HOURS", 72)
+BULK_WRITE_BATCH_SIZE = _setting("BULK_WRITE_BATCH_SIZE", 100)
+BULK_WRITE_MAX_AGE_SECONDS = _setting("BULK_WRITE_MAX_AGE_SECONDS", 30)
+DETAIL_FETCH_MODE = _setting("DETAIL_FETCH_MODE", "browser")
+DETAIL_CONCURRENCY = _setting("DETAIL_CONCURRENCY", 4)
+HTTP_POOL_SIZE = _setting("HTTP_POOL_SIZE", 4)
+DRIVER_BLOCK_PROFILE = _setting("DRIVER_BLOCK_PROFILE", "none")
+DRIVER_BLOCK_PROFILES = _setting("DRIVER_BLOCK_PROFILES", {"none": []})
+DRIVER_WARMUP = _setting("DRIVER_WARMUP", True)
+CRAWL_FRONTIER_COLLECTION = _setting("CRAWL_FRONTIER_COLLECTION", "crawl_frontier")
+CRAWL_FRONTIER_TTL_DAYS = _setting("CRAWL_FRONTIER_TTL_DAYS", 7)
+CRAWL_SCHEDULE = _setting("CRAWL_SCHEDULE", "all")
+CRAWL_TIME_BUDGET_MINUTES = _setting("CRAWL_TIME_BUDGET_MINUTES", 200)
+CHURN_HISTORY_RUNS = _setting("CHURN_HISTORY_RUNS", 10)
+CHURN_MIN_EXPECTED_FRESH = _setting("CHURN_MIN_EXPECTED_FRESH", 3)
+CHURN_MAX_INTERVAL_HOURS = _setting("CHURN_MAX_INTERVAL_HOURS", 24)
+SCRAPE_REPORT_PATH = _setting("SCRAPE_REPORT_PATH", "logs/scrape_report.json")
+SCRAPE_METRICS_PATH = _setting("SCRAPE_METRICS_PATH", "logs/scrape_metrics.prom")
+DRIVER_PROFILE_DIR = _setting("DRIVER_PROFILE_DIR", "")
+DRIVER_RECYCLE_PAGES = _setting("DRIVER_RECYCLE_PAGES", 150)
+DRIVER_MAX_RSS_MB = _setting("DRIVER_MAX_RSS_MB", 1500)
+DRIVER_PAGE_LOAD_TIMEOUT = _setting("DRIVER_PAGE_LOAD_TIMEOUT", 60)
+QUEUE_COLLECTION = _setting("QUEUE_COLLECTION", "crawl_queue")
+QUEUE_LEASE_SECONDS = _setting("QUEUE_LEASE_SECONDS", 300)
+QUEUE_MAX_ATTEMPTS = _setting("QUEUE_MAX_ATTEMPTS", 3)
+QUEUE_RETRY_BACKOFF_SECONDS = _setting("QUEUE_RETRY_BACKOFF_SECONDS", 60)
+QUEUE_POLL_SECONDS = _setting("QUEUE_POLL_SECONDS", 10)
+PIPELINE_ENABLED = _setting("PIPELINE_ENABLED", False)
+PIPELINE_QUEUE_SIZE = _setting("PIPELINE_QUEUE_SIZE", 50)
+PRICE_HISTORY_COLLECTION = _setting("PRICE_HISTORY_COLLECTION", "price_history")
+STATS_COLLECTION = _setting("STATS_COLLECTION", "stats")
+
+from services.rate_limiter import AdaptiveRateLimiter
+from services.bulk_writer import BulkUpsertBuffer
+from services.html_parser import parse_listing_page, parse_detail_page, detect_block
+from services.http_fetcher import HttpDetailFetcher, fetch_details_concurrently
+from services.crawl_frontier import CrawlFrontier, IN_PROGRESS, DONE
+from services.page_archive import PageArchive, ReplayDriver
+from services.crawl_scheduler import ChurnScheduler, record_category_run
+from services.scrape_metrics import ScrapeMetrics
+from services.driver_manager import ManagedDriver, DriverInitError
+from services.work_queue import LeaseWorkQueue, LeaseLost, make_owner
+from services.pipeline import PipelineStage, STOP, bounded_queue
+from services.price_history import apply_change
+from models.connection import get_database, ping
+from models.stats import refresh_stats
+from models.filter_keys import filter_keys
+
 # Configure logging
 os.makedirs("logs", exist_ok=True)
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
+    format='%(asctime)s - %(levelname)s - [%(threadName)s] %(message)s',
     handlers=[
         logging.FileHandler("logs/scraper.log", encoding='utf-8'),
         logging.StreamHandler(sys.stdout)
     ]
 )
 logger = logging.getLogger(__name__)
+if _missing_settings:
+    logger.warning(f"config.py is missing settings, using defaults: {', '.join(_missing_settings)}")
+
+# Tüm worker'ların paylaştığı, tarama hızını tek başına belirleyen zamanlayıcı
+rate_limiter = AdaptiveRateLimiter(
+    start_rpm=RATE_LIMIT_START_RPM,
+    min_rpm=RATE_LIMIT_MIN_RPM,
+    max_rpm=RATE_LIMIT_MAX_RPM,
+    jitter=RATE_LIMIT_JITTER,
+    block_cooldown=RATE_LIMIT_BLOCK_COOLDOWN_SECONDS
+)
+
+# undetected_chromedriver sürücü dosyasını yamalarken paralel başlatma çakışır
+_driver_init_lock = threading.Lock()
+# Aynı anda sadece bir worker konsoldan ENTER bekleyebilir
+_intervention_lock = threading.Lock()
+# Ctrl+C / SIGTERM: worker'lar mevcut ilanı bitirip tamponu yazarak çıkar
+shutdown_event = threading.Event()
+
+# Faz süreleri (sayfa açma, bekleme, ayrıştırma, DB...) kategori ve çalışma bazında
+metrics = ScrapeMetrics()
+
+# --capture: çekilen her sayfa bu arşive yazılır
+page_archive = None
+# --replay: arşivden okunurken bekleme, scroll ve istek bütçesi devre dışı
+pacing_enabled = True
+
+
+# Engellenebilir kaynak grupları (Network.setBlockedURLs desenleri)
+BLOCKABLE_RESOURCES = {
+    "images": ["*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico"],
+    "media": ["*.mp4", "*.webm", "*.m3u8", "*.mp3", "*.ogg"],
+    "fonts": ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"],
+    "stylesheets": ["*.css"],
+    "trackers": [
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+        "*googlesyndication.com*", "*googleadservices.com*", "*adservice.google.*",
+        "*facebook.net*", "*connect.facebook.com*", "*hotjar.com*", "*criteo.*",
+        "*yandex.ru/metrika*", "*mc.yandex.*", "*scorecardresearch.com*", "*adform.net*",
+    ],
+}
+
+
+def get_db_connection(uri=None):
+    """MongoDB bağlantısı (web ve AI işleriyle aynı havuz/TLS ayarları, models/connection.py)"""
+    health = ping(uri)
+    if not health["ok"]:
+        logger.error(f"MongoDB Connection Error: {health['error']}")
+        return None
+    logger.info(f"Connected to MongoDB: {DB_NAME} ({health['latency_ms']} ms, pool {health['max_pool_size']})")
+    return get_database(DB_NAME, uri)
+
+
+def block_patterns(profile):
+    """Profil adından engellenecek URL desenlerini üret"""
+    groups = DRIVER_BLOCK_PROFILES.get(profile, [])
+    return [pattern for group in groups for pattern in BLOCKABLE_RESOURCES.get(group, [])]
 
 
-def get_db_connection():
-    """MongoDB bağlantısı"""
+def apply_resource_blocking(driver, profile):
+    """CDP ile ağır kaynakları (resim, medya, font, reklam/analitik) engelle"""
+    patterns = block_patterns(profile)
+    if not patterns:
+        return
     try:
-        client = MongoClient(MONGO_URI)
-        db = client[DB_NAME]
-        logger.info(f"Connected to MongoDB: {DB_NAME}")
-        return db
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        logger.info(f"Resource blocking '{profile}': {len(patterns)} patterns")
     except Exception as e:
-        logger.error(f"MongoDB Connection Error: {e}")
-        return None
+        logger.warning(f"Could not enable resource blocking: {e}")
 
 
-def init_driver():
-    """Chrome driver başlat"""
+def init_driver(block_profile=DRIVER_BLOCK_PROFILE, warmup=DRIVER_WARMUP, profile_dir=None):
+    """
+    Chrome driver başlat
+    
+    profile_dir verilirse Chrome bu kalıcı profil dizinini kullanır (çerezler korunur).
+    Başlatılamazsa DriverInitError yükseltir.
+    """
     options = uc.ChromeOptions()
     options.add_argument('--no-sandbox')
     options.add_argument('--disable-dev-shm-usage')
@@ -76,60 +238,76 @@ def init_driver():
     ]
     options.add_argument(f'--user-agent={random.choice(user_agents)}')
     options.add_argument('--lang=tr-TR,tr;q=0.9,en-US;q=0.8,en;q=0.7')
+    if "images" in DRIVER_BLOCK_PROFILES.get(block_profile, []):
+        # Görseller render edilmez; CDP engeli istek seviyesinde de keser
+        options.add_argument('--blink-settings=imagesEnabled=false')
     
     try:
-        driver = uc.Chrome(options=options)
+        with _driver_init_lock:
+            driver = uc.Chrome(options=options, user_data_dir=profile_dir or None)
         logger.info("Chrome driver initialized")
         
         # Stealth
         driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
         
+        apply_resource_blocking(driver, block_profile)
+        
         # Warmup
-        logger.info("Warming up browser...")
-        driver.get("https://www.google.com")
-        time.sleep(random.uniform(2, 4))
+        if warmup:
+            logger.info("Warming up browser...")
+            driver.get("https://www.google.com")
+            time.sleep(random.uniform(2, 4))
         
         return driver
     except Exception as e:
         logger.error(f"Failed to init driver: {e}")
-        sys.exit(1)
+        raise DriverInitError(str(e)) from e
+
 
+def navigate(driver, url):
+    """Hız sınırlayıcıdan izin alarak sayfaya git"""
+    if pacing_enabled:
+        with metrics.phase("sleep"):
+            rate_limiter.acquire(url)
+    with metrics.phase("navigate"):
+        driver.get(url)
 
-def random_sleep(min_s=2, max_s=5):
-    """Rastgele bekleme"""
-    time.sleep(random.uniform(min_s, max_s))
+
+def capture_page(url, kind, html):
+    """--capture açıksa sayfayı arşive yaz"""
+    if page_archive is None or not html:
+        return
+    try:
+        page_archive.store(url, kind, html)
+    except Exception as e:
+        logger.warning(f"Could not archive {url}: {e}")
 
 
-def wait_for_manual_intervention(driver):
+def wait_for_manual_intervention(driver, url=None):
     """
     Bot kontrolü veya giriş ekranı algılandığında bekler.
     Kullanıcı engeli kaldırıp Enter'a bastığında devam eder.
+    Sonuç hız sınırlayıcıya bildirilir (engel -> yavaşla, temiz -> hızlan).
     """
     check_interval = 2
     need_intervention = False
+    started = time.perf_counter()
     
     while True:
         try:
-            page_source = driver.page_source
-            current_url = driver.current_url
-            
-            # Bot veya giriş kontrolü
-            is_bot = any(x in page_source for x in ["Olağandışı", "Olağan dışı", "robot", "captcha"])
-            is_login = any(x in current_url for x in ["UyeGiris", "giris-yap", "secure.sahibinden.com/giris"])
-            
-            # İçerik geldiyse engel yok
-            has_results = len(driver.find_elements(By.CSS_SELECTOR, "tr.searchResultsItem, .classifiedDetail")) > 0
-            
-            if not is_bot and not is_login:
-                break
-            
-            if has_results:
+            # Bot veya giriş kontrolü (içerik geldiyse engel yok)
+            block = detect_block(driver.page_source, driver.current_url)
+            if block is None:
                 break
             
+            if not need_intervention:
+                cooldown = rate_limiter.record_block(url or driver.current_url)
+                logger.warning(f"Blocked ({block}), slowing down to {rate_limiter.current_rate():.1f} req/min, "
+                               f"cooldown {cooldown:.0f}s")
             need_intervention = True
-            if is_bot:
+            if block == "bot":
                 logger.warning("!!! BOT KONTROLU !!! Tarayıcıda çözün, sonra CMD'ye gelip ENTER basın...")
-            elif is_login:
+            else:
                 logger.warning("!!! GIRIS EKRANI !!! Giriş yapın, sonra CMD'ye gelip ENTER basın...")
                 
             time.sleep(check_interval)
@@ -137,114 +315,103 @@ def wait_for_manual_intervention(driver):
             logger.error(f"Waiting error: {e}")
             break
     
+    if not need_intervention:
+        rate_limiter.record_success(url or driver.current_url)
+    
     # Sadece müdahale gerekliyse Enter bekle
     if need_intervention:
-        print("\n" + "="*50)
-        input(">>> İşlem tamamlandı mı? ENTER'a basın...")
-        print("="*50 + "\n")
+        with _intervention_lock:
+            print("\n" + "="*50)
+            input(">>> İşlem tamamlandı mı? ENTER'a basın...")
+            print("="*50 + "\n")
+        metrics.add("manual", time.perf_counter() - started)
 
 
 def random_scroll(driver):
     """Gerçek kullanıcı gibi rastgele scroll yapar"""
+    if not pacing_enabled:
+        return
     try:
-        total_height = driver.execute_script("return document.body.scrollHeight")
-        scroll_to = random.randint(100, min(800, total_height))
-        driver.execute_script(f"window.scrollTo({{top: {scroll_to}, behavior: 'smooth'}});")
-        time.sleep(random.uniform(1, 2))
-        driver.execute_script(f"window.scrollTo({{top: 0, behavior: 'smooth'}});")
+        with metrics.phase("sleep"):
+            total_height = driver.execute_script("return document.body.scrollHeight")
+            scroll_to = random.randint(100, min(800, total_height))
+            driver.execute_script(f"window.scrollTo({{top: {scroll_to}, behavior: 'smooth'}});")
+            time.sleep(random.uniform(1, 2))
+            driver.execute_script(f"window.scrollTo({{top: 0, behavior: 'smooth'}});")
     except:
         pass
 
 
-def parse_price(text):
-    """Fiyat parse et"""
-    if not text:
-        return 0
-    try:
-        clean = text.replace('TL', '').replace('.', '').replace(',', '').strip()
-        return int(clean)
-    except:
-        return 0
+# Detay sayfasından gelen alanlar (detay alınamazsa mevcut değerlere dokunulmaz)
+DETAIL_FIELDS = ("yakit", "vites", "boyali_parcalar", "degisen_parcalar", "hasar_puani")
 
 
-def parse_km(text):
-    """KM parse et"""
-    if not text:
-        return 0
-    try:
-        clean = text.replace('km', '').replace('.', '').replace(',', '').strip()
-        return int(clean)
-    except:
-        return 0
+def empty_detail():
+    """Detayı hiç alınamamış yeni ilanın başlangıç değerleri"""
+    return {
+        "yakit": "",
+        "vites": "",
+        "boyali_parcalar": [],
+        "degisen_parcalar": [],
+        "hasar_puani": 0
+    }
 
 
-def get_detail_info(driver, url):
+def get_detail_info(driver, url, fetcher=None):
     """
     İlan detay sayfasından ek bilgi çek:
     - Yakıt tipi
     - Vites
     - Boyalı parçalar
     - Değişen parçalar
-    """
-    result = {
-        "yakit": "",
-        "vites": "",
-        "boyali_parcalar": [],
-        "degisen_parcalar": [],
-        "hasar_puani": 0
-    }
     
+    fetcher verilirse sayfa önce düz HTTP ile denenir; engel algılanırsa tarayıcıya düşülür.
+    Sayfa alınamaz veya ayrıştırılamazsa None.
+    """
+    return parse_detail_html(url, fetch_detail_html(driver, url, fetcher=fetcher))
+
+
+def fetch_detail_html(driver, url, fetcher=None):
+    """Detay sayfasının HTML'i: önce HTTP (fetcher varsa), olmazsa tarayıcı; alınamazsa None"""
+    if fetcher is not None:
+        with metrics.phase("detail"):
+            html = fetcher.fetch(url)
+        if html is not None:
+            capture_page(url, "detail", html)
+            return html
+    return fetch_detail_html_from_browser(driver, url, fetcher=fetcher)
+
+
+def fetch_detail_html_from_browser(driver, url, fetcher=None):
+    """Detay sayfasını tarayıcıyla aç ve kaynağını döndür"""
     try:
-        driver.get(url)
-        wait_for_manual_intervention(driver)
-        random_scroll(driver)
-        random_sleep(2, 4)
-        
-        # Bilgi tablosunu bul
-        try:
-            info_rows = driver.find_elements(By.CSS_SELECTOR, ".classifiedInfoList li")
-            for row in info_rows:
-                try:
-                    label = row.find_element(By.CSS_SELECTOR, "strong").text.strip()
-                    value = row.text.replace(label, "").strip()
-                    
-                    if "Yakıt" in label:
-                        result["yakit"] = value
-                    elif "Vites" in label:
-                        result["vites"] = value
-                except:
-                    continue
-        except:
-            pass
-        
-        # Tramer / Expertise bilgisi
-        try:
-            # Boya-Değişen bölümü
-            damage_section = driver.find_elements(By.CSS_SELECTOR, ".classified-expertise-list li, .damage-history li")
-            for item in damage_section:
-                text = item.text.strip().lower()
-                if "boyalı" in text or "boyali" in text:
-                    result["boyali_parcalar"].append(item.text.strip())
-                elif "değişen" in text or "degisen" in text:
-                    result["degisen_parcalar"].append(item.text.strip())
-        except:
-            pass
+        with metrics.phase("detail"):
+            navigate(driver, url)
+            wait_for_manual_intervention(driver, url)
+            random_scroll(driver)
+            html = driver.page_source
+        capture_page(url, "detail", html)
         
-        # Tramer kaydı kontrol
-        try:
-            page_text = driver.page_source.lower()
-            if "tramer kaydı bulunmamaktadır" in page_text or "hasar kaydı yok" in page_text:
-                result["hasar_puani"] = 0
-            elif "tramer" in page_text or "hasar kaydı" in page_text:
-                # Basit skor: boyalı = 5, değişen = 15
-                result["hasar_puani"] = len(result["boyali_parcalar"]) * 5 + len(result["degisen_parcalar"]) * 15
-        except:
-            pass
-            
+        # Tarayıcı engeli geçtiyse yeni çerezleri HTTP oturumuna aktar
+        if fetcher is not None:
+            fetcher.sync_from_driver(driver)
+        return html
+    except DriverInitError:
+        raise
     except Exception as e:
         logger.warning(f"Detail fetch failed for {url}: {e}")
-    
-    return result
+        return None
+
+
+def parse_detail_html(url, html):
+    """Detay HTML'ini tek seferde ayrıştır (sayfa yoksa veya ayrıştırılamazsa None)"""
+    if html:
+        try:
+            with metrics.phase("parse"):
+                return parse_detail_page(html)
+        except Exception as e:
+            logger.warning(f"Detail parse failed for {url}: {e}")
+    return None
 
 
 def scrape_listing_page(driver, url):
@@ -252,218 +419,1125 @@ def scrape_listing_page(driver, url):
     listings = []
     
     try:
-        driver.get(url)
-        wait_for_manual_intervention(driver)
+        navigate(driver, url)
+        wait_for_manual_intervention(driver, url)
         random_scroll(driver)
-        random_sleep(3, 5)
         
         # İlanları bekle
         try:
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "tr.searchResultsItem"))
-            )
+            with metrics.phase("wait"):
+                WebDriverWait(driver, 15 if pacing_enabled else 0).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, "tr.searchResultsItem"))
+                )
         except:
             logger.warning(f"No listings found on {url}")
             return []
         
-        items = driver.find_elements(By.CSS_SELECTOR, "tr.searchResultsItem")
-        
-        for item in items:
-            try:
-                data_id = item.get_attribute("data-id")
-                if not data_id:
-                    continue
-                
-                # Başlık ve link
-                title_elem = item.find_element(By.CSS_SELECTOR, ".classifiedTitle")
-                title = title_elem.text.strip()
-                link = title_elem.get_attribute("href")
-                
-                # Fiyat
-                try:
-                    price_elem = item.find_element(By.CSS_SELECTOR, ".searchResultsPriceValue")
-                    price = parse_price(price_elem.text)
-                except:
-                    price = 0
-                
-                # Tablo hücreleri
-                cells = item.find_elements(By.TAG_NAME, "td")
-                
-                model_name = cells[1].text.strip() if len(cells) > 1 else ""
-                year = 0
-                if len(cells) > 3:
-                    try:
-                        year = int(cells[3].text.strip())
-                    except:
-                        pass
-                
-                km = parse_km(cells[4].text) if len(cells) > 4 else 0
-                color = cells[5].text.strip() if len(cells) > 5 else ""
-                location = cells[8].text.replace('\n', ' ').strip() if len(cells) > 8 else ""
-                
-                listings.append({
-                    "ilan_no": data_id,
-                    "baslik": title,
-                    "url": link,
-                    "fiyat": price,
-                    "model_detay": model_name,
-                    "yil": year,
-                    "km": km,
-                    "renk": color,
-                    "raw_location": location
-                })
-                
-            except Exception as e:
-                continue
+        # Sayfa kaynağı tek seferde alınıp ayrıştırılır
+        html = driver.page_source
+        capture_page(url, "listing", html)
+        with metrics.phase("parse"):
+            listings = parse_listing_page(html)
         
         logger.info(f"Found {len(listings)} listings on page")
         
+    except DriverInitError:
+        raise
     except Exception as e:
         logger.error(f"Error scraping page {url}: {e}")
     
     return listings
 
 
-def scrape_category(driver, db, brand_key, model_key, model_info):
-    """Kategori için tüm sayfaları tara"""
+def ilan_number(ilan_no):
+    """İlan numarasını karşılaştırma için int'e çevir"""
+    try:
+        return int(ilan_no)
+    except (TypeError, ValueError):
+        return 0
+
+
+def load_known_listings(collection, ilan_nos):
+    """Sayfadaki ilanlardan veritabanında olanları tek sorguda getir"""
+    if not ilan_nos:
+        return {}
+    cursor = collection.find(
+        {"ilan_no": {"$in": list(ilan_nos)}},
+        {"_id": 0, "ilan_no": 1, "fiyat": 1, "km": 1, "detail_fetched_at": 1, "scraped_at": 1}
+    )
+    return {doc["ilan_no"]: doc for doc in cursor}
+
+
+class DetailCache:
+    """
+    ilan_no bazlı detay önbelleği.
+
+    Kaynak tum_araclar koleksiyonunun kendisidir: sayfadaki ilanlar tek sorguda
+    yüklenir, detay sayfasına gidilip gidilmeyeceğine liste verisiyle karar verilir.
+    """
+
+    def __init__(self, collection, ttl_hours=DETAIL_CACHE_TTL_HOURS):
+        self.collection = collection
+        self.ttl = timedelta(hours=ttl_hours) if ttl_hours else None
+        self._entries = {}
+
+    def load(self, ilan_nos):
+        """Sayfanın ilanlarını önbelleğe al"""
+        self._entries = load_known_listings(self.collection, ilan_nos)
+        return self._entries
+
+    def get(self, ilan_no):
+        return self._entries.get(ilan_no)
+
+    def needs_detail(self, listing):
+        """Liste verisine göre detay sayfasının yeniden açılması gerekiyor mu?"""
+        if self.ttl is None:
+            return True
+        previous = self._entries.get(listing["ilan_no"])
+        if previous is None:
+            return True
+        if previous.get("fiyat") != listing["fiyat"] or previous.get("km") != listing["km"]:
+            return True
+        # Eski kayıtlarda detail_fetched_at yok; scraped_at yeterli
+        fetched_at = previous.get("detail_fetched_at") or previous.get("scraped_at")
+        if not isinstance(fetched_at, datetime):
+            return True
+        return datetime.now() - fetched_at > self.ttl
+
+    def touch_operation(self, ilan_no):
+        """Değişmemiş ilanın sadece zaman damgalarını güncelleyen işlem"""
+        return UpdateOne(
+            {"ilan_no": ilan_no},
+            {"$set": {"scraped_at": datetime.now(), "updated_at": datetime.utcnow()}}
+        )
+
+
+def get_high_water_mark(db, brand_key, model_key):
+    """Kategorinin son taramada görülen en yeni ilanını getir"""
+    return db[CRAWL_STATE_COLLECTION].find_one({"_id": f"{brand_key}/{model_key}"})
+
+
+def save_high_water_mark(db, brand_key, model_key, newest_ilan_no):
+    """Kategorinin high-water mark'ını güncelle"""
+    db[CRAWL_STATE_COLLECTION].update_one(
+        {"_id": f"{brand_key}/{model_key}"},
+        {"$set": {
+            "marka": brand_key,
+            "model": model_key,
+            "newest_ilan_no": str(newest_ilan_no),
+            "newest_seen_at": datetime.utcnow()
+        }},
+        upsert=True
+    )
+
+
+def full_sweep_due(mark):
+    """
+    Kategori bu çalışmada mark'ta durmadan taranmalı mı
+
+    Mark'ın altındaki ilanların updated_at'i sadece tam taramada yenilenir; saklama
+    temizliği updated_at'e baktığı için INCREMENTAL_FULL_SWEEP_HOURS aralıkla gerekir.
+    """
+    if not INCREMENTAL_FULL_SWEEP_HOURS:
+        return False
+    swept_at = (mark or {}).get("full_swept_at")
+    return swept_at is None or datetime.utcnow() - swept_at > timedelta(hours=INCREMENTAL_FULL_SWEEP_HOURS)
+
+
+def save_full_sweep(db, brand_key, model_key):
+    """Kategorinin tüm derinliği tarandı (mark'ın altındaki ilanlar da touch edildi)"""
+    db[CRAWL_STATE_COLLECTION].update_one(
+        {"_id": f"{brand_key}/{model_key}"},
+        {"$set": {"marka": brand_key, "model": model_key, "full_swept_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+
+def build_vehicle_doc(listing, detail, brand_key, model_key):
+    """
+    Liste ve detay verisini veritabanı dokümanında birleştir
+
+    detail None ise (detay alınamadı) detay alanları ve detail_fetched_at dokümana girmez:
+    kayıttaki iyi detay verisi ezilmez ve DetailCache sonraki taramada detayı tekrar çeker.
+    """
+    location_parts = listing["raw_location"].split()
+    
+    vehicle_doc = {
+        "ilan_no": listing["ilan_no"],
+        "baslik": listing["baslik"],
+        "url": listing["url"],
+        "fiyat": listing["fiyat"],
+        "marka": brand_key,
+        "model": model_key,
+        "model_detay": listing["model_detay"],
+        "yil": listing["yil"],
+        "km": listing["km"],
+        "renk": listing["renk"],
+        "il": location_parts[0] if location_parts else "",
+        "ilce": location_parts[1] if len(location_parts) > 1 else "",
+        "category": f"{brand_key} {model_key}",
+        "scraped_at": datetime.now(),
+        "updated_at": datetime.utcnow()
+    }
+    if detail is not None:
+        vehicle_doc.update({field: detail[field] for field in DETAIL_FIELDS})
+        vehicle_doc["detail_fetched_at"] = datetime.now()
+    # Dashboard filtreleri için normalize anahtarlar (marka_key, model_key, yakit_key, vites_key)
+    keys = filter_keys(vehicle_doc)
+    if detail is None:
+        # yakit/vites bilinmiyor: mevcut anahtarlar korunur
+        keys.pop("yakit_key")
+        keys.pop("vites_key")
+    vehicle_doc.update(keys)
+    return vehicle_doc
+
+
+def upsert_operation(vehicle_doc):
+    """ilan_no üzerinden upsert işlemi (detaysız yeni ilan boş detay alanlarıyla eklenir)"""
+    update = {"$set": vehicle_doc}
+    if "detail_fetched_at" not in vehicle_doc:
+        update["$setOnInsert"] = empty_detail()
+    return UpdateOne({"ilan_no": vehicle_doc["ilan_no"]}, update, upsert=True)
+
+
+def listing_page_url(base_url, page):
+    """Kategori liste sayfasının URL'i (sayfa başına 20 ilan)"""
+    offset = page * 20
+    if "?" in base_url:
+        return f"{base_url}&pagingOffset={offset}"
+    return f"{base_url}?pagingOffset={offset}"
+
+
+def classify_listings(listings, detail_cache, mark_no, known_streak=0, skip=()):
+    """
+    Sayfadaki ilanları liste verisiyle sınıflandır (detay sayfasına gitmeden)
+    
+    Returns:
+        dict: to_fetch (detayı çekilecek ilanlar), unchanged (sadece zaman damgası
+        güncellenecek ilan no'ları), newest_no, known_streak, reached_mark (high-water
+        mark'a ulaşıldı, sayfalama durmalı), new / changed (planlayıcı için sayılar)
+    """
+    result = {"to_fetch": [], "unchanged": [], "newest_no": 0, "known_streak": known_streak,
+              "reached_mark": False, "new": 0, "changed": 0}
+    for listing in listings:
+        number = ilan_number(listing["ilan_no"])
+        result["newest_no"] = max(result["newest_no"], number)
+        
+        # Yarım kalan çalışmada zaten yazılmış ilan
+        if listing["ilan_no"] in skip:
+            continue
+        
+        previous = detail_cache.get(listing["ilan_no"])
+        if previous is None:
+            result["new"] += 1
+        elif previous.get("fiyat") != listing["fiyat"] or previous.get("km") != listing["km"]:
+            result["changed"] += 1
+        
+        # Bilinen ve fiyatı değişmemiş eski ilan: art arda yeterince görülürse dur
+        if mark_no and previous is not None and number <= mark_no and previous.get("fiyat") == listing["fiyat"]:
+            result["known_streak"] += 1
+            if result["known_streak"] >= INCREMENTAL_KNOWN_STREAK:
+                result["reached_mark"] = True
+                break
+            continue
+        result["known_streak"] = 0
+        
+        if detail_cache.needs_detail(listing):
+            result["to_fetch"].append(listing)
+        else:
+            result["unchanged"].append(listing["ilan_no"])
+    return result
+
+
+class InlineSink:
+    """
+    Kategori taramasının yazım tarafı (sıralı mod): detay ayrıştırma, doküman
+    oluşturma ve tampona yazma tarayıcı thread'inde yapılır.
+    
+    end_page() sayfanın yazımlarını gönderir ve yazım hatası yoksa frontier'da
+    sayfanın ilanlarını (ve istenirse sayfayı) tamamlandı işaretler.
+    
+    history_collection verilirse fiyatı/km'si değişen ilanlar için fiyat geçmişi
+    noktası ayrı bir tamponla yazılır.
+    """
+
+    def __init__(self, collection, brand_key, model_key, frontier=None, history_collection=None):
+        self.writer = BulkUpsertBuffer(collection, batch_size=BULK_WRITE_BATCH_SIZE,
+                                       max_age_seconds=BULK_WRITE_MAX_AGE_SECONDS)
+        self.history = None
+        if history_collection is not None:
+            self.history = BulkUpsertBuffer(history_collection, batch_size=BULK_WRITE_BATCH_SIZE,
+                                            max_age_seconds=BULK_WRITE_MAX_AGE_SECONDS)
+        self.brand_key = brand_key
+        self.model_key = model_key
+        self.frontier = frontier
+        self.saved = 0
+        self._processed = []
+        self._errors_before = 0
+
+    def touch(self, operation, ilan_no):
+        """Değişmemiş ilanın zaman damgası güncellemesi"""
+        self._add(operation, ilan_no, saved=False)
+
+    def vehicle(self, listing, html, previous=None):
+        """
+        Detay HTML'iyle birlikte ilan (html None ise detay alanlarına dokunulmadan yazılır).
+        previous: ilanın veritabanındaki son hali (fiyat/km), yeni ilanda None
+        """
+        operation, history_op = self._upsert(listing, html, previous)
+        self._add(operation, listing["ilan_no"], saved=True, history_op=history_op)
+
+    def end_page(self, page_key, complete=True):
+        self._end_page(page_key, complete)
+
+    def close(self):
+        with metrics.phase("db_write"):
+            self.writer.flush()
+            if self.history is not None:
+                self.history.flush()
+
+    def _upsert(self, listing, html, previous):
+        detail = parse_detail_html(listing["url"], html)
+        vehicle_doc = build_vehicle_doc(listing, detail, self.brand_key, self.model_key)
+        # Sadece gerçek değişimde changed_at + geçmiş noktası
+        history_op = apply_change(vehicle_doc, previous)
+        return upsert_operation(vehicle_doc), history_op
+
+    def _add(self, operation, ilan_no, saved, history_op=None):
+        with metrics.phase("db_write"):
+            self.writer.add(operation)
+            if history_op is not None and self.history is not None:
+                self.history.add(history_op)
+        self._processed.append(ilan_no)
+        if saved:
+            self.saved += 1
+
+    def _end_page(self, page_key, complete):
+        # Sayfa sonu: biriken yazımları gönder
+        with metrics.phase("db_write"):
+            self.writer.flush()
+            if self.history is not None:
+                self.history.flush()
+        
+        # Checkpoint: yazımı kesinleşen ilanlar ve (yarıda kesilmediyse) sayfa tamamlandı
+        if self.frontier is not None and self.writer.errors == self._errors_before:
+            self.frontier.complete_many("listing", self._processed)
+            if complete:
+                self.frontier.mark("page", page_key, DONE)
+        self._processed = []
+        self._errors_before = self.writer.errors
+
+
+class PipelineSink(InlineSink):
+    """
+    Boru hattı modu: tarayıcı thread'i sadece sayfa açar; ayrıştırma/doküman
+    oluşturma (normalize) ve MongoDB yazımı (writer) ayrı thread'lerde, sınırlı
+    kuyruklarla bağlı çalışır. Kuyruk dolarsa tarayıcı bekler (backpressure).
+    
+    Tüm öğeler aynı sırayla iki aşamadan geçtiği için sayfa sonu işareti,
+    sayfanın bütün yazımlarından sonra işlenir.
+    """
+
+    def __init__(self, collection, brand_key, model_key, frontier=None, history_collection=None,
+                 queue_size=PIPELINE_QUEUE_SIZE):
+        super().__init__(collection, brand_key, model_key, frontier=frontier,
+                         history_collection=history_collection)
+        self._normalize_queue = bounded_queue(queue_size)
+        self._write_queue = bounded_queue(queue_size)
+        category = f"{brand_key}/{model_key}"
+        prefix = threading.current_thread().name
+        self._stages = [
+            PipelineStage(f"{prefix}-normalize", self._normalize, self._normalize_queue, self._write_queue,
+                          on_start=lambda: metrics.attach(category)),
+            PipelineStage(f"{prefix}-writer", self._write, self._write_queue,
+                          on_start=lambda: metrics.attach(category), on_close=super().close),
+        ]
+        for stage in self._stages:
+            stage.start()
+
+    def touch(self, operation, ilan_no):
+        self._normalize_queue.put(("op", operation, ilan_no, False, None))
+
+    def vehicle(self, listing, html, previous=None):
+        self._normalize_queue.put(("vehicle", listing, html, previous))
+
+    def end_page(self, page_key, complete=True):
+        self._normalize_queue.put(("end_page", page_key, complete))
+
+    def close(self):
+        """Kuyruklardaki her şey yazılana kadar bekle"""
+        self._normalize_queue.put(STOP)
+        for stage in self._stages:
+            stage.join()
+
+    def _normalize(self, item):
+        if item[0] == "vehicle":
+            _, listing, html, previous = item
+            operation, history_op = self._upsert(listing, html, previous)
+            return [("op", operation, listing["ilan_no"], True, history_op)]
+        return [item]
+
+    def _write(self, item):
+        if item[0] == "op":
+            _, operation, ilan_no, saved, history_op = item
+            self._add(operation, ilan_no, saved, history_op)
+        else:
+            _, page_key, complete = item
+            self._end_page(page_key, complete)
+
+
+def scrape_category(driver, db, brand_key, model_key, model_info, stats=None, incremental=INCREMENTAL_CRAWL,
+                    fetcher=None, detail_concurrency=DETAIL_CONCURRENCY, frontier=None,
+                    detail_cache_ttl=DETAIL_CACHE_TTL_HOURS, max_pages=MAX_PAGES_PER_CATEGORY, pipelined=False):
+    """
+    Kategori için tüm sayfaları tara
+    
+    frontier verilirse bu çalışmada tamamlanmış sayfa ve ilanlar atlanır,
+    yeni tamamlananlar sayfa yazımı bittikten sonra işaretlenir.
+    max_pages planlayıcının kategoriye ayırdığı sayfa derinliğidir.
+    pipelined=True ise ayrıştırma ve DB yazımı tarayıcıyla paralel aşamalarda yapılır.
+    """
     base_url = model_info['url']
     category_name = model_info['name']
     collection = db[COLLECTION_NAME]
     
     logger.info(f"=== Scraping: {brand_key} {category_name} ===")
     
-    total_saved = 0
+    # Artımlı tarama: önceki taramanın en yeni ilanı
+    mark = get_high_water_mark(db, brand_key, model_key) if incremental else None
+    mark_no = ilan_number(mark.get("newest_ilan_no")) if mark else 0
+    if mark_no and full_sweep_due(mark):
+        # Periyodik tam tarama: mark'ın altındaki ilanların updated_at'i de yenilenir
+        logger.info(f"Full sweep due, ignoring high-water mark {mark_no} for this run")
+        mark_no = 0
+        max_pages = max(max_pages, MAX_PAGES_PER_CATEGORY)
+    elif mark_no:
+        logger.info(f"High-water mark: {mark_no}")
+    full_sweep = not mark_no
+    # Tam tarama ancak sayfalar gerçekten sona kadar gezildiyse kaydedilir: max_pages'e
+    # ulaşıldı veya son sayfa 1-19 ilanla bitti. Boş sayfa (zaman aşımı/hata olabilir) sayılmaz.
+    walk_complete = False
+    newest_no = 0
+    known_streak = 0
+    reached_mark = False
+    detail_cache = DetailCache(collection, ttl_hours=detail_cache_ttl)
+    total_touched = 0
     
-    # 10 sayfa tara
-    for page in range(MAX_PAGES_PER_CATEGORY):
-        offset = page * 20
-        
-        if "?" in base_url:
-            page_url = f"{base_url}&pagingOffset={offset}"
+    # Planlayıcı geçmişi: bulunan yeni/değişen ilan ve harcanan süre
+    started = time.time()
+    pages_scanned = 0
+    new_count = 0
+    changed_count = 0
+    
+    # Yazımlar tamponda birikir; sayfa sonunda, eşikte ve çıkışta (hata olsa bile) yazılır
+    sink_class = PipelineSink if pipelined else InlineSink
+    sink = sink_class(collection, brand_key, model_key, frontier=frontier,
+                      history_collection=db[PRICE_HISTORY_COLLECTION])
+    try:
+        for page in range(max_pages):
+            if shutdown_event.is_set():
+                break
+            page_key = f"{brand_key}/{model_key}/{page}"
+            # Sadece devam ettirilen çalışmada önceden bitmiş sayfa olabilir
+            if frontier is not None and frontier.resumed and frontier.is_done("page", page_key):
+                logger.info(f"Page {page + 1} already done in this run, skipping")
+                continue
+            page_url = listing_page_url(base_url, page)
+            logger.info(f"Page {page + 1}/{max_pages}: {page_url}")
+            
+            listings = scrape_listing_page(driver, page_url)
+            pages_scanned += 1
+            if stats is not None:
+                stats.pages += 1
+            
+            if not listings:
+                logger.info(f"No more listings, stopping at page {page + 1}")
+                break
+            
+            page_ids = [l["ilan_no"] for l in listings]
+            with metrics.phase("db_read"):
+                detail_cache.load(page_ids)
+                done_listings = (frontier.done_keys("listing", page_ids)
+                                 if frontier is not None and frontier.resumed else set())
+            # Önce liste verisiyle hangi ilanların detayına gidileceğine karar ver
+            page_plan = classify_listings(listings, detail_cache, mark_no, known_streak, skip=done_listings)
+            newest_no = max(newest_no, page_plan["newest_no"])
+            known_streak = page_plan["known_streak"]
+            reached_mark = page_plan["reached_mark"]
+            new_count += page_plan["new"]
+            changed_count += page_plan["changed"]
+            to_fetch = page_plan["to_fetch"]
+            
+            # Liste verisi değişmediyse detay sayfasına gitme
+            for ilan_no in page_plan["unchanged"]:
+                sink.touch(detail_cache.touch_operation(ilan_no), ilan_no)
+                total_touched += 1
+                if stats is not None:
+                    stats.details_skipped += 1
+            
+            # HTTP modunda sayfanın detayları eşzamanlı çekilir (sınırlı eşzamanlılık + ortak bütçe)
+            prefetched = {}
+            if fetcher is not None and detail_concurrency > 1 and to_fetch:
+                with metrics.phase("detail"):
+                    prefetched = fetch_details_concurrently(
+                        fetcher, [l["url"] for l in to_fetch], concurrency=detail_concurrency
+                    )
+            
+            # Her ilan için detay sayfasına git
+            for listing in to_fetch:
+                if shutdown_event.is_set():
+                    break
+                try:
+                    # Detay sayfası
+                    html = prefetched.get(listing["url"])
+                    if html is not None:
+                        capture_page(listing["url"], "detail", html)
+                    elif prefetched:
+                        # Eşzamanlı HTTP denemesi başarısız: doğrudan tarayıcı
+                        html = fetch_detail_html_from_browser(driver, listing["url"], fetcher=fetcher)
+                    else:
+                        html = fetch_detail_html(driver, listing["url"], fetcher=fetcher)
+                    
+                    # Ayrıştır, birleştir ve tampona ekle (upsert)
+                    sink.vehicle(listing, html, previous=detail_cache.get(listing["ilan_no"]))
+                    
+                except DriverInitError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error processing {listing.get('ilan_no', '?')}: {e}")
+                    continue
+            
+            # Sayfa sonu: yazımlar gönderilir, checkpoint işaretlenir
+            sink.end_page(page_key, complete=not shutdown_event.is_set())
+            
+            if reached_mark:
+                logger.info(f"Reached known listings at page {page + 1}, stopping")
+                break
+            if len(listings) < 20:
+                logger.info(f"Last page reached at page {page + 1}")
+                walk_complete = not shutdown_event.is_set()
+                break
         else:
-            page_url = f"{base_url}?pagingOffset={offset}"
-        
-        logger.info(f"Page {page + 1}/{MAX_PAGES_PER_CATEGORY}: {page_url}")
-        
-        listings = scrape_listing_page(driver, page_url)
-        
-        if not listings:
-            logger.info(f"No more listings, stopping at page {page + 1}")
-            break
+            walk_complete = not shutdown_event.is_set()
+    finally:
+        sink.close()
+        logger.info(f"DB writes for {category_name}: {sink.writer.summary()}")
+        if stats is not None:
+            stats.add_writes(sink.writer)
+    total_saved = sink.saved
+    
+    # Önceki işarete kadar inilmediyse arada boşluk kalabilir; işaret korunur
+    if incremental and newest_no > mark_no and (reached_mark or not mark_no):
+        save_high_water_mark(db, brand_key, model_key, newest_no)
+    elif incremental and mark_no and not reached_mark:
+        logger.info("Previous high-water mark not reached, keeping it")
+    # Yazım hatası varsa bazı ilanların updated_at'i yenilenmemiş olabilir
+    if full_sweep and walk_complete and sink.writer.errors == 0:
+        save_full_sweep(db, brand_key, model_key)
+    
+    # Tekrar oynatmada süreler gerçek taramayı yansıtmaz
+    if pacing_enabled and pages_scanned:
+        record_category_run(db, CRAWL_STATE_COLLECTION, brand_key, model_key, new_count, changed_count,
+                            pages_scanned, time.time() - started, history_size=CHURN_HISTORY_RUNS)
+    
+    # Dashboard istatistikleri: sadece bu kategorinin dokümanı yeniden hesaplanır
+    if total_saved or total_touched:
+        try:
+            with metrics.phase("db_write"):
+                refresh_stats(db, COLLECTION_NAME, STATS_COLLECTION, brand_key, model_key)
+        except Exception as e:
+            logger.warning(f"Stats refresh failed for {brand_key}/{model_key}: {e}")
+    
+    logger.info(f"Saved {total_saved} vehicles for {category_name} ({total_touched} unchanged, detail skipped)")
+    return total_saved
+
+
+class WorkerStats:
+    """Worker başına verim sayaçları"""
+
+    def __init__(self, worker_id):
+        self.worker_id = worker_id
+        self.categories = 0
+        self.pages = 0
+        self.vehicles = 0
+        self.details_skipped = 0
+        self.db_inserted = 0
+        self.db_modified = 0
+        self.db_unchanged = 0
+        self.started_at = time.time()
+        self.finished_at = None
+
+    def add_writes(self, writer):
+        """Kategori yazım sayaçlarını ekle"""
+        self.db_inserted += writer.inserted
+        self.db_modified += writer.modified
+        self.db_unchanged += writer.unchanged
+
+    @property
+    def elapsed(self):
+        return (self.finished_at or time.time()) - self.started_at
+
+    def summary(self):
+        hours = max(self.elapsed, 1) / 3600
+        return (f"Worker {self.worker_id}: {self.categories} categories, {self.pages} pages, "
+                f"{self.vehicles} vehicles, {self.details_skipped} detail skips in {self.elapsed / 60:.1f} min "
+                f"({self.vehicles / hours:.0f} vehicles/h, {self.pages / hours:.0f} pages/h); "
+                f"DB: {self.db_inserted} inserted, {self.db_modified} modified, {self.db_unchanged} unchanged")
+
+
+def plan_categories(scheduler=None):
+    """
+    Taranacak kategoriler: [(brand_key, model_key, model_info, max_pages), ...]
+    
+    scheduler verilirse sadece zamanı gelen kategoriler, öncelik sırasıyla ve
+    planlanan sayfa derinliğiyle döner.
+    """
+    categories = []
+    for brand_key, brand_data in VEHICLE_CATEGORIES.items():
+        for model_key, model_info in brand_data.get('models', {}).items():
+            # Atlanacak modelleri kontrol et
+            if model_key in SKIP_MODELS:
+                logger.info(f"ATLANIYOR: {brand_key}/{model_key} (SKIP_MODELS listesinde)")
+                continue
+            categories.append((brand_key, model_key, model_info))
+    
+    if scheduler is not None:
+        return scheduler.plan(categories)
+    return [(b, m, info, MAX_PAGES_PER_CATEGORY) for b, m, info in categories]
+
+
+def build_work_queue(frontier=None, scheduler=None):
+    """Taranacak kategorileri (bu süreçteki worker'ların) ortak iş kuyruğuna koy"""
+    categories = plan_categories(scheduler)
+    
+    # Checkpoint: bu çalışmada tamamlanan kategoriler tekrar taranmaz
+    if frontier is not None:
+        keys = [f"{b}/{m}" for b, m, *_ in categories]
+        frontier.seed("category", keys)
+        pending = set(frontier.unfinished("category", keys))
+        skipped = len(categories) - len(pending)
+        if skipped:
+            logger.info(f"Resume: {skipped} categories already done")
+        categories = [c for c in categories if f"{c[0]}/{c[1]}" in pending]
+    
+    work_queue = Queue()
+    for item in categories:
+        work_queue.put(item)
+    return work_queue
+
+
+def scrape_options(**overrides):
+    """Çalıştırma ayarları (config varsayılanları, CLI ile değiştirilebilir)"""
+    options = {
+        "incremental": INCREMENTAL_CRAWL,
+        "detail_mode": DETAIL_FETCH_MODE,
+        "detail_concurrency": DETAIL_CONCURRENCY,
+        "block_profile": DRIVER_BLOCK_PROFILE,
+        "warmup": DRIVER_WARMUP,
+        "frontier": None,
+        "detail_cache_ttl": DETAIL_CACHE_TTL_HOURS,
+        "replay_archive": None,
+        "scheduler": None,
+        "pipeline": PIPELINE_ENABLED,
+    }
+    options.update(overrides)
+    return options
+
+
+def write_scrape_report(all_stats=None, status="finished"):
+    """Faz ölçümlerini JSON rapor ve Prometheus dosyası olarak yaz (admin paneli okur)"""
+    extra = {"status": status, "rate_limiter": rate_limiter.snapshot()}
+    if all_stats:
+        extra["workers"] = [stats.summary() for stats in all_stats]
+        extra["totals"] = {
+            "categories": sum(s.categories for s in all_stats),
+            "pages": sum(s.pages for s in all_stats),
+            "vehicles": sum(s.vehicles for s in all_stats),
+            "details_skipped": sum(s.details_skipped for s in all_stats),
+            "db_inserted": sum(s.db_inserted for s in all_stats),
+            "db_modified": sum(s.db_modified for s in all_stats),
+            "rate_limit_blocks": rate_limiter.blocks_hit,
+        }
+    try:
+        return metrics.write(SCRAPE_REPORT_PATH, SCRAPE_METRICS_PATH, extra=extra)
+    except Exception as e:
+        logger.warning(f"Could not write scrape report: {e}")
+        return None
+
+
+def open_browser(worker_id, options):
+    """Worker'ın sürücüsünü (ve http modunda HTTP oturumunu) aç"""
+    if options["replay_archive"] is not None:
+        driver = ReplayDriver(options["replay_archive"])
+    else:
+        def start_browser(profile_dir, warmup):
+            return init_driver(block_profile=options["block_profile"],
+                               warmup=warmup and options["warmup"], profile_dir=profile_dir)
         
-        # Her ilan için detay sayfasına git
-        for listing in listings:
+        # Worker başına kalıcı profil; geri dönüşüm ve yeniden başlatmalar rapora sayılır
+        driver = ManagedDriver(
+            start_browser,
+            profile_dir=os.path.join(DRIVER_PROFILE_DIR, f"worker-{worker_id}") if DRIVER_PROFILE_DIR else None,
+            max_pages=DRIVER_RECYCLE_PAGES,
+            max_rss_mb=DRIVER_MAX_RSS_MB,
+            page_load_timeout=DRIVER_PAGE_LOAD_TIMEOUT,
+            on_event=metrics.count,
+            name=f"Worker {worker_id} browser"
+        )
+        driver.driver  # İlk tarayıcıyı hemen aç (başlatma hatası kuyruğa girmeden görülsün)
+    fetcher = None
+    if options["detail_mode"] == "http":
+        # Worker başına ayrı, tarayıcı çerezleriyle beslenen HTTP oturumu
+        fetcher = HttpDetailFetcher(rate_limiter, pool_size=max(HTTP_POOL_SIZE, options["detail_concurrency"]))
+        fetcher.sync_from_driver(driver)
+    return driver, fetcher
+
+
+def close_browser(worker_id, driver, fetcher):
+    if fetcher is not None:
+        logger.info(f"Worker {worker_id}: {fetcher.summary()}")
+        fetcher.close()
+    if isinstance(driver, ManagedDriver):
+        logger.info(driver.summary())
+    if driver is not None:
+        logger.info(f"Worker {worker_id}: closing driver...")
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+
+def run_worker(worker_id, work_queue, db, stats, options=None):
+    """Kendi tarayıcısıyla kuyruk boşalana kadar kategori tara"""
+    options = options or scrape_options()
+    detail_concurrency = options["detail_concurrency"]
+    frontier = options["frontier"]
+    driver = None
+    fetcher = None
+    try:
+        driver, fetcher = open_browser(worker_id, options)
+        while True:
             try:
-                # Detay bilgisi çek
-                detail = get_detail_info(driver, listing["url"])
-                
-                # Birleştir
-                location_parts = listing["raw_location"].split()
-                
-                vehicle_doc = {
-                    "ilan_no": listing["ilan_no"],
-                    "baslik": listing["baslik"],
-                    "url": listing["url"],
-                    "fiyat": listing["fiyat"],
-                    "marka": brand_key,
-                    "model": model_key,
-                    "model_detay": listing["model_detay"],
-                    "yil": listing["yil"],
-                    "km": listing["km"],
-                    "renk": listing["renk"],
-                    "yakit": detail["yakit"],
-                    "vites": detail["vites"],
-                    "boyali_parcalar": detail["boyali_parcalar"],
-                    "degisen_parcalar": detail["degisen_parcalar"],
-                    "hasar_puani": detail["hasar_puani"],
-                    "il": location_parts[0] if location_parts else "",
-                    "ilce": location_parts[1] if len(location_parts) > 1 else "",
-                    "category": f"{brand_key} {model_key}",
-                    "scraped_at": datetime.now()
-                }
-                
-                # MongoDB'ye kaydet (upsert)
-                collection.update_one(
-                    {"ilan_no": listing["ilan_no"]},
-                    {"$set": vehicle_doc},
-                    upsert=True
-                )
-                total_saved += 1
-                
+                brand_key, model_key, model_info, max_pages = work_queue.get_nowait()
+            except Empty:
+                break
+            if shutdown_event.is_set():
+                break
+            try:
+                if frontier is not None:
+                    frontier.mark("category", f"{brand_key}/{model_key}", IN_PROGRESS)
+                with metrics.category(f"{brand_key}/{model_key}"):
+                    stats.vehicles += scrape_category(driver, db, brand_key, model_key, model_info,
+                                                      stats=stats, incremental=options["incremental"],
+                                                      fetcher=fetcher, detail_concurrency=detail_concurrency,
+                                                      frontier=frontier, detail_cache_ttl=options["detail_cache_ttl"],
+                                                      max_pages=max_pages, pipelined=options["pipeline"])
+                stats.categories += 1
+                write_scrape_report(status="running")
+                if frontier is not None and not shutdown_event.is_set():
+                    frontier.mark("category", f"{brand_key}/{model_key}", DONE)
+            except DriverInitError:
+                raise
             except Exception as e:
-                logger.error(f"Error processing {listing.get('ilan_no', '?')}: {e}")
+                logger.error(f"Worker {worker_id} failed on {brand_key}/{model_key}: {e}")
+            finally:
+                work_queue.task_done()
+    except DriverInitError as e:
+        # Kalan kategoriler diğer worker'larda (veya --resume ile) taranır
+        logger.error(f"Worker {worker_id} stopped, browser unavailable: {e}")
+    finally:
+        stats.finished_at = time.time()
+        close_browser(worker_id, driver, fetcher)
+
+
+def start_workers(target, work_queue, db, workers, options):
+    """Worker thread'lerini başlat, bitmelerini bekle (Ctrl+C'de tamponları yazdırarak durdur)"""
+    all_stats = [WorkerStats(i + 1) for i in range(workers)]
+    threads = []
+    for stats in all_stats:
+        t = threading.Thread(
+            target=target,
+            args=(stats.worker_id, work_queue, db, stats, options),
+            name=f"worker-{stats.worker_id}",
+            daemon=True
+        )
+        t.start()
+        threads.append(t)
+
+    try:
+        while any(t.is_alive() for t in threads):
+            for t in threads:
+                t.join(timeout=1)
+    except KeyboardInterrupt:
+        logger.warning("Shutdown requested, flushing pending writes...")
+        shutdown_event.set()
+        for t in threads:
+            t.join()
+
+    for stats in all_stats:
+        logger.info(stats.summary())
+    logger.info(rate_limiter.summary())
+    
+    report = write_scrape_report(all_stats, status="interrupted" if shutdown_event.is_set() else "finished")
+    if report is not None:
+        shares = ", ".join(f"{name} {share:.0%}" for name, share in report["phase_share"].items() if share)
+        logger.info(f"Time by phase: {shares} (report: {SCRAPE_REPORT_PATH})")
+    return all_stats
+
+
+def run_worker_pool(db, workers, options=None):
+    """N bağımsız tarayıcı oturumuyla kategorileri paralel tara"""
+    options = options or scrape_options()
+    frontier = options["frontier"]
+    work_queue = build_work_queue(frontier, scheduler=options["scheduler"])
+    category_keys = [f"{b}/{m}" for b, m, *_ in list(work_queue.queue)]
+    workers = max(1, min(workers, work_queue.qsize() or 1))
+    logger.info(f"Starting {workers} worker(s) for {work_queue.qsize()} categories")
+
+    all_stats = start_workers(run_worker, work_queue, db, workers, options)
+    
+    if frontier is not None:
+        logger.info(f"Frontier progress: {frontier.progress()}")
+        # Tüm kategoriler bittiyse çalışma kapanır; aksi halde --resume ile devam edilir
+        if not shutdown_event.is_set() and not frontier.unfinished("category", category_keys):
+            frontier.finish()
+        else:
+            logger.info(f"Crawl run {frontier.run_id} incomplete, continue with --resume")
+    return sum(s.vehicles for s in all_stats)
+
+
+# ========================================
+# DAĞITIK MOD (--queue): Mongo'da kiralamalı iş kuyruğu
+# ========================================
+
+def seed_queue(db, work_queue, scheduler=None):
+    """Yeni bir tarama turu için her kategorinin ilk sayfasını kuyruğa koy"""
+    round_id = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    active = work_queue.active_count()
+    if active:
+        logger.warning(f"{active} units from earlier rounds are still pending or leased")
+    items = [
+        (f"{b}/{m}/0", {"brand_key": b, "model_key": m, "base_url": info["url"], "page": 0,
+                        "max_pages": max_pages, "newest_no": 0})
+        for b, m, info, max_pages in plan_categories(scheduler)
+    ]
+    added = work_queue.enqueue_many(round_id, "page", items)
+    logger.info(f"Queue round {round_id}: {added} categories seeded")
+    return round_id
+
+
+def process_page_unit(driver, db, unit, work_queue, writer, options, stats, lease=None):
+    """
+    Liste sayfası birimi: ilanları sınıflandır, değişmeyenleri güncelle, detayları
+    ayrı birim olarak kuyruğa koy, gerekiyorsa kategorinin sonraki sayfasını ekle.
+    Kira kaybedildiyse (lease) yazım yapılmaz; yazım hatasında birim tamamlanmaz.
+    """
+    payload = unit["payload"]
+    brand_key, model_key, page = payload["brand_key"], payload["model_key"], payload["page"]
+    page_url = listing_page_url(payload["base_url"], page)
+    logger.info(f"Page {page + 1}/{payload['max_pages']}: {page_url}")
+    
+    listings = scrape_listing_page(driver, page_url)
+    stats.pages += 1
+    
+    mark = get_high_water_mark(db, brand_key, model_key) if options["incremental"] else None
+    mark_no = ilan_number(mark.get("newest_ilan_no")) if mark else 0
+    # Tam tarama kararı ilk sayfada verilir ve zincir boyunca taşınır
+    if "full_sweep" not in payload:
+        payload["full_sweep"] = not mark_no or full_sweep_due(mark)
+        if payload["full_sweep"]:
+            payload["max_pages"] = max(payload["max_pages"], MAX_PAGES_PER_CATEGORY)
+    if payload["full_sweep"]:
+        mark_no = 0
+    newest_no = payload["newest_no"]
+    reached_mark = False
+    
+    if listings:
+        detail_cache = DetailCache(db[COLLECTION_NAME], ttl_hours=options["detail_cache_ttl"])
+        with metrics.phase("db_read"):
+            detail_cache.load([l["ilan_no"] for l in listings])
+        page_plan = classify_listings(listings, detail_cache, mark_no)
+        newest_no = max(newest_no, page_plan["newest_no"])
+        reached_mark = page_plan["reached_mark"]
+        
+        if lease is not None:
+            lease.check()
+        errors_before = writer.errors
+        with metrics.phase("db_write"):
+            for ilan_no in page_plan["unchanged"]:
+                writer.add(detail_cache.touch_operation(ilan_no))
+            writer.flush()
+        if writer.errors != errors_before:
+            raise RuntimeError(f"DB write failed for page {brand_key}/{model_key}/{page}")
+        stats.details_skipped += len(page_plan["unchanged"])
+        
+        # Detaylar önce işlensin diye sayfalardan yüksek öncelikli
+        work_queue.enqueue_many(unit["round"], "detail", [
+            (listing["ilan_no"], {"brand_key": brand_key, "model_key": model_key, "listing": listing,
+                                  "previous": known_state(detail_cache.get(listing["ilan_no"]))})
+            for listing in page_plan["to_fetch"]
+        ], priority=1)
+    
+    # Sayfa doluysa ve işarete ulaşılmadıysa zincir sonraki sayfayla devam eder
+    if listings and len(listings) >= 20 and not reached_mark and page + 1 < payload["max_pages"]:
+        work_queue.enqueue(unit["round"], "page", f"{brand_key}/{model_key}/{page + 1}",
+                           dict(payload, page=page + 1, newest_no=newest_no))
+    else:
+        if options["incremental"] and newest_no > mark_no and (reached_mark or not mark_no):
+            save_high_water_mark(db, brand_key, model_key, newest_no)
+        # Boş sayfa hata/zaman aşımı olabilir; tam tarama sadece dolu son sayfada kaydedilir
+        if payload["full_sweep"] and listings:
+            save_full_sweep(db, brand_key, model_key)
+
+
+def known_state(previous):
+    """Kuyruk birimine konacak son bilinen durum (değişim tespiti için sadece fiyat/km)"""
+    if previous is None:
+        return None
+    return {"fiyat": previous.get("fiyat"), "km": previous.get("km")}
+
+
+def process_detail_unit(driver, unit, writer, fetcher, stats, history=None, lease=None):
+    """
+    Detay birimi: detay sayfasını çek ve ilanı yaz (birim ancak yazım kesinleşince tamamlanır)
+
+    Yazım her birimde bilerek hemen gönderilir (ilan başına bir bulk_write): birim done
+    işaretlenmeden önce ilanın ve fiyat geçmişinin kalıcı olması gerekir, aksi halde çöken
+    süreçte tamponda kalan ilanlar kuyrukta done görünüp kaybolur. Toplu yazım kazancı
+    kuyruk modunda bu dayanıklılık için bırakılır.
+    """
+    payload = unit["payload"]
+    listing = payload["listing"]
+    detail = get_detail_info(driver, listing["url"], fetcher=fetcher)
+    vehicle_doc = build_vehicle_doc(listing, detail, payload["brand_key"], payload["model_key"])
+    history_op = apply_change(vehicle_doc, payload.get("previous"))
+    # Detay çekilirken kira başka sürece geçtiyse sonuç yazılmaz
+    if lease is not None:
+        lease.check()
+    errors_before = writer.errors
+    history_errors_before = history.errors if history is not None else 0
+    with metrics.phase("db_write"):
+        writer.add(upsert_operation(vehicle_doc))
+        writer.flush()
+        if history_op is not None and history is not None:
+            history.add(history_op)
+            history.flush()
+    if writer.errors != errors_before:
+        raise RuntimeError(f"DB write failed for {listing['ilan_no']}")
+    if history is not None and history.errors != history_errors_before:
+        raise RuntimeError(f"Price history write failed for {listing['ilan_no']}")
+    stats.vehicles += 1
+
+
+def run_queue_worker(worker_id, work_queue, db, stats, options=None):
+    """Ortak kuyruktan birim kiralayıp işle; kuyruk tamamen boşalınca çık"""
+    options = options or scrape_options()
+    owner = make_owner(worker_id)
+    writer = BulkUpsertBuffer(db[COLLECTION_NAME], batch_size=BULK_WRITE_BATCH_SIZE,
+                              max_age_seconds=BULK_WRITE_MAX_AGE_SECONDS)
+    history = BulkUpsertBuffer(db[PRICE_HISTORY_COLLECTION], batch_size=BULK_WRITE_BATCH_SIZE,
+                               max_age_seconds=BULK_WRITE_MAX_AGE_SECONDS)
+    driver = None
+    fetcher = None
+    try:
+        driver, fetcher = open_browser(worker_id, options)
+        while not shutdown_event.is_set():
+            unit = work_queue.claim(owner)
+            if unit is None:
+                # Başka süreçlerin elindeki sayfalar yeni birim üretebilir
+                if work_queue.active_count() == 0:
+                    break
+                shutdown_event.wait(QUEUE_POLL_SECONDS)
                 continue
             
-            # Detay sayfaları arası kısa bekleme
-            random_sleep(1, 2)
-        
-        # Sayfa arası bekleme
-        random_sleep(3, 6)
+            payload = unit["payload"]
+            try:
+                with work_queue.keep_alive(unit, owner) as lease, \
+                        metrics.category(f"{payload['brand_key']}/{payload['model_key']}"):
+                    if unit["kind"] == "page":
+                        process_page_unit(driver, db, unit, work_queue, writer, options, stats, lease)
+                    else:
+                        process_detail_unit(driver, unit, writer, fetcher, stats, history, lease)
+                work_queue.complete(unit, owner)
+            except LeaseLost:
+                logger.warning(f"Lease on {unit['_id']} expired while working, another process took it")
+            except DriverInitError:
+                work_queue.release(unit, owner)
+                raise
+            except Exception as e:
+                work_queue.fail(unit, owner, e)
+    except DriverInitError as e:
+        logger.error(f"Worker {worker_id} stopped, browser unavailable: {e}")
+    finally:
+        writer.flush()
+        history.flush()
+        stats.add_writes(writer)
+        stats.finished_at = time.time()
+        close_browser(worker_id, driver, fetcher)
+
+
+def run_queue_pool(db, workers, options=None):
+    """Bu süreçte N worker ile ortak kuyruğu işle (diğer makinelerdeki süreçlerle birlikte)"""
+    options = options or scrape_options()
+    work_queue = LeaseWorkQueue(db, QUEUE_COLLECTION, lease_seconds=QUEUE_LEASE_SECONDS,
+                                max_attempts=QUEUE_MAX_ATTEMPTS, retry_backoff_seconds=QUEUE_RETRY_BACKOFF_SECONDS)
+    work_queue.ensure_indexes()
+    logger.info(f"Queue worker {make_owner('*')}: {work_queue.progress()}")
     
-    logger.info(f"Saved {total_saved} vehicles for {category_name}")
-    return total_saved
+    all_stats = start_workers(run_queue_worker, work_queue, db, max(1, workers), options)
+    
+    logger.info(f"Queue progress: {work_queue.progress()}")
+    # Detay birimleri kategoriler arasında karışık işlendiği için istatistikler toplu yenilenir
+    try:
+        refresh_stats(db, COLLECTION_NAME, STATS_COLLECTION)
+    except Exception as e:
+        logger.warning(f"Stats refresh failed: {e}")
+    return sum(s.vehicles for s in all_stats)
 
 
-def run_ai_predictions(db):
-    """AI tahminlerini çalıştır"""
+def run_ai_predictions(db, changed_since=None):
+    """AI tahminlerini çalıştır (changed_since verilirse sadece bu taramada değişen araçlar)"""
     logger.info("Running AI predictions...")
     try:
         from services.ai_model import price_model
-        price_model.update_all_predictions()
+        price_model.update_all_predictions(changed_since=changed_since)
         logger.info("AI predictions completed")
     except Exception as e:
         logger.error(f"AI prediction error: {e}")
 
 
+def _handle_sigterm(signum, frame):
+    raise KeyboardInterrupt
+
+
 def main():
     parser = argparse.ArgumentParser(description='Sahibinden Advanced Scraper')
     parser.add_argument('--skip-ai', action='store_true', help='Skip AI predictions')
+    parser.add_argument('--workers', type=int, default=SCRAPER_WORKERS,
+                        help='Number of parallel browser sessions')
+    parser.add_argument('--full', action='store_true',
+                        help='Ignore high-water marks and crawl every page')
+    parser.add_argument('--detail-mode', choices=['browser', 'http'], default=DETAIL_FETCH_MODE,
+                        help='Fetch detail pages through Chrome or a cookie-sharing HTTP session')
+    parser.add_argument('--detail-concurrency', type=int, default=DETAIL_CONCURRENCY,
+                        help='Concurrent detail fetches per page in http mode')
+    parser.add_argument('--block-profile', choices=sorted(DRIVER_BLOCK_PROFILES), default=DRIVER_BLOCK_PROFILE,
+                        help='Resource groups to block in Chrome (images, fonts, trackers...)')
+    parser.add_argument('--no-warmup', action='store_true', help='Skip the google.com warm-up visit')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue the last unfinished crawl run from its checkpoint')
+    parser.add_argument('--capture', metavar='DIR',
+                        help='Write every fetched page into a compressed page archive')
+    parser.add_argument('--replay', metavar='DIR',
+                        help='Run the parse/upsert pipeline from a page archive instead of the live site '
+                             '(requires --mongo-uri pointing at a non-production MongoDB)')
+    parser.add_argument('--schedule', choices=['all', 'churn'], default=CRAWL_SCHEDULE,
+                        help='Crawl every category, or pick categories and depth from recent churn')
+    parser.add_argument('--pipeline', action='store_true', default=PIPELINE_ENABLED,
+                        help='Parse and write to MongoDB on background stages while the browser navigates')
+    parser.add_argument('--queue', choices=['seed', 'work'],
+                        help='Distributed mode: seed a crawl round into the shared Mongo queue, '
+                             'or work queued units (run on any number of machines)')
+    parser.add_argument('--mongo-uri', help='Override MONGO_URI (e.g. a local mongod for replays)')
     args = parser.parse_args()
+    if args.replay:
+        # Arşivdeki eski sayfalar canlı ilanların üzerine yazılmasın: hedef açıkça verilmeli
+        if not args.mongo_uri:
+            parser.error("--replay requires --mongo-uri (e.g. mongodb://localhost:27017/)")
+        if args.mongo_uri == MONGO_URI:
+            parser.error("--replay must not target the production MONGO_URI")
+    
+    global page_archive, pacing_enabled
+    replay_archive = None
+    if args.replay:
+        # Tekrar oynatma: canlı siteye gidilmez, bekleme yok, tüm ilanlar yeniden ayrıştırılır
+        replay_archive = PageArchive(args.replay)
+        pacing_enabled = False
+        args.detail_mode = "browser"
+        args.full = True
+        args.skip_ai = True
+        args.schedule = "all"
+    elif args.capture:
+        page_archive = PageArchive(args.capture)
+    if args.queue:
+        # AI tahminleri kuyruk boşaldıktan sonra tek yerden (run_ai_job.py) çalıştırılır
+        args.skip_ai = True
+    
+    # SIGTERM (cron timeout, systemd) Ctrl+C gibi ele alınır
+    signal.signal(signal.SIGTERM, _handle_sigterm)
 
     logger.info("=" * 50)
     logger.info("Starting Advanced Scraper v3")
     logger.info("=" * 50)
     
-    # IP kontrol
-    try:
-        resp = requests.get('https://api.ipify.org?format=json', timeout=10)
-        ip = resp.json().get('ip')
-        logger.info(f"Current IP: {ip}")
-    except:
-        pass
+    # IP kontrol (tekrar oynatmada ve kuyruk doldururken siteye gidilmez)
+    if replay_archive is None and args.queue != "seed":
+        try:
+            resp = requests.get('https://api.ipify.org?format=json', timeout=10)
+            ip = resp.json().get('ip')
+            logger.info(f"Current IP: {ip}")
+        except:
+            pass
     
     # DB bağlan
-    db = get_db_connection()
+    db = get_db_connection(args.mongo_uri)
     if db is None:
         logger.error("Database connection failed!")
         return
     
-    # Driver başlat
-    driver = init_driver()
-    
     try:
-        total = 0
-        for brand_key, brand_data in VEHICLE_CATEGORIES.items():
-            for model_key, model_info in brand_data.get('models', {}).items():
-                # Atlanacak modelleri kontrol et
-                if model_key in SKIP_MODELS:
-                    logger.info(f"ATLANIYOR: {brand_key}/{model_key} (SKIP_MODELS listesinde)")
-                    continue
-                saved = scrape_category(driver, db, brand_key, model_key, model_info)
-                total += saved
-                random_sleep(5, 10)
+        scheduler = None
+        if args.schedule == "churn":
+            scheduler = ChurnScheduler(
+                db, CRAWL_STATE_COLLECTION,
+                time_budget_minutes=CRAWL_TIME_BUDGET_MINUTES,
+                max_pages=MAX_PAGES_PER_CATEGORY,
+                min_expected_fresh=CHURN_MIN_EXPECTED_FRESH,
+                max_interval_hours=CHURN_MAX_INTERVAL_HOURS,
+                workers=args.workers
+            )
+        
+        if args.queue == "seed":
+            work_queue = LeaseWorkQueue(db, QUEUE_COLLECTION)
+            work_queue.ensure_indexes()
+            seed_queue(db, work_queue, scheduler)
+            return
+        
+        # Her worker kendi driver'ını açıp kapatır
+        options = scrape_options(
+            incremental=INCREMENTAL_CRAWL and not args.full,
+            detail_mode=args.detail_mode,
+            detail_concurrency=args.detail_concurrency,
+            block_profile=args.block_profile,
+            warmup=DRIVER_WARMUP and not args.no_warmup,
+            # Kuyruk modunda ilerleme kuyruğun kendisinde tutulur
+            frontier=None if args.queue else CrawlFrontier.open(db, resume=args.resume,
+                                                                collection_name=CRAWL_FRONTIER_COLLECTION,
+                                                                ttl_days=CRAWL_FRONTIER_TTL_DAYS),
+            detail_cache_ttl=0 if replay_archive is not None else DETAIL_CACHE_TTL_HOURS,
+            replay_archive=replay_archive,
+            scheduler=scheduler,
+            pipeline=args.pipeline,
+        )
+        started = time.time()
+        run_started_at = datetime.utcnow()
+        if args.queue == "work":
+            total = run_queue_pool(db, args.workers, options)
+        else:
+            total = run_worker_pool(db, args.workers, options)
+        elapsed = max(time.time() - started, 0.001)
         
-        logger.info(f"Total scraped: {total} vehicles")
+        logger.info(f"Total scraped: {total} vehicles in {elapsed:.1f}s ({total / elapsed:.2f} vehicles/s)")
+        if page_archive is not None:
+            logger.info(page_archive.summary())
         
         # AI tahminleri
         if not args.skip_ai:
-            run_ai_predictions(db)
+            run_ai_predictions(db, changed_since=run_started_at)
         
     except Exception as e:
         logger.error(f"Scraper error: {e}")
     finally:
-        logger.info("Closing driver...")
-        driver.quit()
         logger.info("Scraper finished!")
 
 
@@ -0,0 +1,259 @@
+"""
+EkerGallery - Kiralamalı (Lease) İş Kuyruğu
+Taramayı birden çok makineye/IP'ye dağıtmak için MongoDB üzerinde ortak iş
+kuyruğu. Birimler kategori sayfaları ("page") ve ilan detay URL'leridir
+("detail"); herhangi bir sayıda scraper süreci birimleri atomik olarak
+kiralar (find_one_and_update), çalışırken kirayı yeniler (heartbeat), bitince
+tamamlar. Kirası süresi dolan birim (çöken süreç) başka bir sürece geçer;
+hata alan birim geri çekilmeli (backoff) olarak yeniden denenir.
+
+Doküman yapısı (crawl_queue koleksiyonu):
+    {"_id": "<round>:<kind>:<key>", "round", "kind", "key", "payload",
+     "status": "pending" | "leased" | "done" | "failed",
+     "priority", "attempts", "available_at", "lease_owner", "lease_expires_at",
+     "last_error", "created_at", "updated_at", "finished_at"}
+
+Yerel deneme (tek makinede birkaç süreç):
+    python services/scraper_v2.py --mongo-uri mongodb://localhost:27017/ --queue seed
+    python services/scraper_v2.py --mongo-uri mongodb://localhost:27017/ --queue work   # her terminalde
+    python services/scraper_v2.py --mongo-uri mongodb://localhost:27017/ --queue work --replay archive/2026-10-18
+"""
+
+import logging
+import os
+import socket
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument, UpdateOne, ASCENDING, DESCENDING
+
+from models.indexes import ensure_ttl_index
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+def make_owner(worker_id):
+    """Kirayı tutan sürecin/worker'ın kimliği"""
+    return f"{socket.gethostname()}:{os.getpid()}:{worker_id}"
+
+
+class LeaseLost(Exception):
+    """Birimin kirası başka bir sürece geçti; sonuç yazılmamalı"""
+
+
+class Lease:
+    """keep_alive bloğundaki birimin kira durumu (heartbeat kirayı kaybederse lost set edilir)"""
+
+    def __init__(self, unit):
+        self.unit = unit
+        self.lost = threading.Event()
+
+    def check(self):
+        """Kira kaybedildiyse LeaseLost (yazımdan önce çağrılır)"""
+        if self.lost.is_set():
+            raise LeaseLost(self.unit["_id"])
+
+
+class LeaseWorkQueue:
+    """
+    Süreçler arası paylaşılan iş kuyruğu.
+
+    Args:
+        lease_seconds: kiralanan birimin heartbeat olmadan sahipsiz sayılacağı süre
+        max_attempts: bu kadar denemeden sonra birim "failed" olarak kalır
+        retry_backoff_seconds: hata sonrası bekleme (deneme başına ikiye katlanır)
+        done_ttl_days: tamamlanan birimlerin koleksiyonda kalma süresi
+    """
+
+    def __init__(self, db, collection_name="crawl_queue", lease_seconds=300, max_attempts=3,
+                 retry_backoff_seconds=60, done_ttl_days=7):
+        self.collection = db[collection_name]
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.done_ttl_days = done_ttl_days
+
+    def ensure_indexes(self):
+        self.collection.create_index([
+            ("status", ASCENDING), ("kind", ASCENDING), ("priority", DESCENDING), ("available_at", ASCENDING)
+        ])
+        self.collection.create_index([("status", ASCENDING), ("lease_expires_at", ASCENDING)])
+        # Biten birimler done_ttl_days sonra silinir (finished_at olmayanlara dokunulmaz)
+        ensure_ttl_index(self.collection, "finished_at", self.done_ttl_days * 86400)
+
+    # --- Ekleme ---
+
+    def _insert_operation(self, round_id, kind, key, payload, priority):
+        now = datetime.utcnow()
+        return UpdateOne(
+            {"_id": f"{round_id}:{kind}:{key}"},
+            {"$setOnInsert": {
+                "round": round_id, "kind": kind, "key": key, "payload": payload,
+                "status": PENDING, "priority": priority, "attempts": 0,
+                "available_at": now, "created_at": now, "updated_at": now
+            }},
+            upsert=True
+        )
+
+    def enqueue(self, round_id, kind, key, payload, priority=0):
+        """Birimi ekle (aynı round'da aynı birim zaten varsa dokunulmaz)"""
+        return self.enqueue_many(round_id, kind, [(key, payload)], priority=priority)
+
+    def enqueue_many(self, round_id, kind, items, priority=0):
+        """[(key, payload), ...] birimlerini tek bulk_write ile ekle; yeni eklenen sayısını döndür"""
+        ops = [self._insert_operation(round_id, kind, key, payload, priority) for key, payload in items]
+        if not ops:
+            return 0
+        result = self.collection.bulk_write(ops, ordered=False)
+        return result.upserted_count
+
+    # --- Kiralama ---
+
+    def claim(self, owner, kinds=None):
+        """
+        Sıradaki uygun birimi atomik olarak kirala
+
+        Uygun: zamanı gelmiş pending birim veya kirası dolmuş ve deneme hakkı kalmış
+        leased birim. Öncelik: priority (yüksek önce), sonra available_at.
+
+        Returns:
+            dict: birim dokümanı veya None (kuyrukta uygun iş yok)
+        """
+        now = datetime.utcnow()
+        self._fail_exhausted_leases(now)
+        query = {"$or": [
+            {"status": PENDING, "available_at": {"$lte": now}},
+            {"status": LEASED, "lease_expires_at": {"$lt": now}, "attempts": {"$lt": self.max_attempts}},
+        ]}
+        if kinds:
+            query["kind"] = {"$in": list(kinds)}
+        return self.collection.find_one_and_update(
+            query,
+            {
+                "$set": {
+                    "status": LEASED,
+                    "lease_owner": owner,
+                    "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("priority", DESCENDING), ("available_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def _fail_exhausted_leases(self, now):
+        """
+        Süreci öldüren birimler (ör. Chrome'u çökerten sayfa) fail() çağrılamadan kirası
+        dolmuş olarak kalır; deneme hakkı bittiyse sonsuza kadar tekrar kiralanmaz, failed olur.
+        """
+        result = self.collection.update_many(
+            {"status": LEASED, "lease_expires_at": {"$lt": now}, "attempts": {"$gte": self.max_attempts}},
+            {"$set": {"status": FAILED, "last_error": "lease expired on final attempt", "updated_at": now},
+             "$unset": {"lease_owner": "", "lease_expires_at": ""}}
+        )
+        if result.modified_count:
+            logger.error(f"{result.modified_count} units failed after their final lease expired")
+
+    def _owned(self, unit, owner):
+        return {"_id": unit["_id"], "status": LEASED, "lease_owner": owner}
+
+    def heartbeat(self, unit, owner):
+        """Kirayı uzat; kira kaybedildiyse False"""
+        now = datetime.utcnow()
+        result = self.collection.update_one(
+            self._owned(unit, owner),
+            {"$set": {"lease_expires_at": now + timedelta(seconds=self.lease_seconds), "updated_at": now}}
+        )
+        return result.matched_count == 1
+
+    @contextmanager
+    def keep_alive(self, unit, owner):
+        """
+        Blok çalıştığı sürece arka planda kirayı yenile
+
+        Lease nesnesi döndürür; kira kaybedilirse işleyen taraf lease.check() ile
+        durur ve artık başka sürece ait birim için yazım yapmaz.
+        """
+        lease = Lease(unit)
+        stop = threading.Event()
+        interval = max(1, self.lease_seconds / 3)
+
+        def beat():
+            while not stop.wait(interval):
+                try:
+                    if not self.heartbeat(unit, owner):
+                        logger.warning(f"Lease lost on {unit['_id']}")
+                        lease.lost.set()
+                        return
+                except Exception as e:
+                    logger.warning(f"Heartbeat failed for {unit['_id']}: {e}")
+
+        thread = threading.Thread(target=beat, name=f"heartbeat-{unit['kind']}", daemon=True)
+        thread.start()
+        try:
+            yield lease
+        finally:
+            stop.set()
+            thread.join(timeout=5)
+
+    def complete(self, unit, owner):
+        """Birimi tamamla; kira başka sürece geçmişse LeaseLost"""
+        now = datetime.utcnow()
+        result = self.collection.update_one(
+            self._owned(unit, owner),
+            {"$set": {"status": DONE, "finished_at": now, "updated_at": now},
+             "$unset": {"lease_owner": "", "lease_expires_at": ""}}
+        )
+        if result.matched_count != 1:
+            raise LeaseLost(unit["_id"])
+
+    def fail(self, unit, owner, error):
+        """Hata: deneme hakkı varsa geri çekilmeyle tekrar sıraya, yoksa failed"""
+        now = datetime.utcnow()
+        attempts = unit.get("attempts", 1)
+        if attempts >= self.max_attempts:
+            update = {"$set": {"status": FAILED, "last_error": str(error)[:500], "updated_at": now}}
+            logger.error(f"Unit {unit['_id']} failed after {attempts} attempts: {error}")
+        else:
+            delay = self.retry_backoff_seconds * 2 ** (attempts - 1)
+            update = {"$set": {"status": PENDING, "last_error": str(error)[:500],
+                               "available_at": now + timedelta(seconds=delay), "updated_at": now}}
+            logger.warning(f"Unit {unit['_id']} failed (attempt {attempts}), retry in {delay}s: {error}")
+        update["$unset"] = {"lease_owner": "", "lease_expires_at": ""}
+        self.collection.update_one(self._owned(unit, owner), update)
+
+    def release(self, unit, owner):
+        """Kapanışta bitmemiş birimi deneme hakkı yemeden geri bırak"""
+        self.collection.update_one(
+            self._owned(unit, owner),
+            {"$set": {"status": PENDING, "available_at": datetime.utcnow(), "updated_at": datetime.utcnow()},
+             "$inc": {"attempts": -1},
+             "$unset": {"lease_owner": "", "lease_expires_at": ""}}
+        )
+
+    # --- Durum ---
+
+    def active_count(self, kinds=None):
+        """Bekleyen veya çalışılan birim sayısı (0 = kuyruk boşaldı)"""
+        query = {"status": {"$in": [PENDING, LEASED]}}
+        if kinds:
+            query["kind"] = {"$in": list(kinds)}
+        return self.collection.count_documents(query)
+
+    def progress(self):
+        """Tür ve durum bazında birim sayıları"""
+        pipeline = [
+            {"$match": {"status": {"$in": [PENDING, LEASED, FAILED]}}},
+            {"$group": {"_id": {"kind": "$kind", "status": "$status"}, "count": {"$sum": 1}}}
+        ]
+        return {
+            f"{row['_id']['kind']}:{row['_id']['status']}": row["count"]
+            for row in self.collection.aggregate(pipeline)
+        }
@@ -27,13 +27,18 @@ pip install -r requirements.txt -q
 # 3. İzinleri Ayarla
 chmod +x cron_runner.sh setup_cron.sh
 
-# 4. Servisi Yeniden Başlat
+# 4. Filtre Anahtarlarını Tamamla (API marka_key/model_key ile sorgular; eski kayıtlar
+#    servis başlamadan önce doldurulur, eksik yoksa hızlıca biter)
+echo "🔑 Filtre anahtarları kontrol ediliyor..."
+python3 models/filter_keys.py backfill || echo "⚠️ Filtre anahtarı backfill başarısız, cron temizliğinde tekrar denenecek"
+
+# 5. Servisi Yeniden Başlat
 echo "🔄 Servis yeniden başlatılıyor..."
 pkill -f "gunicorn" || true
 pkill -f "python3 app_v2.py" || true
 
 # Gunicorn ile başlat (Daemon modunda)
-nohup gunicorn -w 4 -b 0.0.0.0:5000 app_v2:app \
+nohup gunicorn -w 4 -k gthread --threads 16 -b 0.0.0.0:5000 app_v2:app \
     --access-logfile /var/log/ekergallery/access.log \
     --error-logfile /var/log/ekergallery/error.log \
     --daemon